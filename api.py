@@ -0,0 +1,259 @@
+# Headless JSON API over the same dataset and filters as the Streamlit app.
+#
+#   uvicorn api:app --port 8080        (standalone)
+#
+# The same routes are also mounted by server.py next to the app.
+#
+#   GET /api/salons?q=barber&type=barber+(name)&niagara=1&open=<slot>
+#                  &bbox=<west>,<south>,<east>,<north>
+#                  &near=<lat>,<lon>&radius=<km>
+#                  &require=has_phone,has_website,has_hours
+#                  &fields=name,city,phone&limit=100&cursor=<next_cursor>
+#                  &prov=CA-ON,CA-QC          (default: CA-ON)
+import base64
+import gzip
+import hashlib
+import json
+import math
+
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import tiles
+from data import (
+    PARTITIONS,
+    filter_positions,
+    get_grid_index,
+    load_data,
+    parse_filter_query,
+)
+from exports import EXPORT_COLUMNS
+from filter_cache import FILTER_CACHE
+from partitions import PROVINCES, parse_provinces
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+# -------------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------------
+API_ROUTE = "/api/salons"
+STATS_ROUTE = "/api/stats"
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+DEFAULT_RADIUS_KM = 5.0
+MAX_RADIUS_KM = 500.0
+MIN_COMPRESS_BYTES = 1024
+EARTH_RADIUS_KM = 6371.0
+FIELDS = EXPORT_COLUMNS + ["distance_km"]
+
+
+class BadRequest(Exception):
+    pass
+
+
+# -------------------------------------------------------------------
+# PARAMETER PARSING
+# -------------------------------------------------------------------
+def _floats(value: str, count: int, name: str):
+    try:
+        parts = [float(p) for p in value.split(",")]
+    except ValueError:
+        parts = []
+    if len(parts) != count or not all(math.isfinite(p) for p in parts):
+        raise BadRequest(f"{name} must be {count} comma-separated numbers")
+    return parts
+
+
+def _cursor_offset(cursor: str | None, version: str) -> int:
+    # Cursors are tied to the dataset version they were issued for
+    if not cursor:
+        return 0
+    try:
+        decoded = base64.urlsafe_b64decode(cursor.encode()).decode()
+        cursor_version, offset = decoded.split(":")
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise BadRequest("invalid cursor")
+    if offset < 0:  # would never advance, so a client would page forever
+        raise BadRequest("invalid cursor")
+    if cursor_version != version:
+        raise BadRequest("cursor is from an older dataset version; restart paging")
+    return offset
+
+
+def _make_cursor(version: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode()).decode()
+
+
+def parse_params(params) -> dict:
+    filters = parse_filter_query(params)
+    if filters is None:
+        raise BadRequest("invalid open slot or require flag")
+
+    provinces = parse_provinces(params.get("prov"))
+    if provinces is None:
+        raise BadRequest(f"prov must be a comma-separated list of {', '.join(PROVINCES)}")
+
+    out = {"filters": filters, "provinces": provinces, "bbox": None, "near": None}
+    if params.get("bbox"):
+        west, south, east, north = _floats(params["bbox"], 4, "bbox")
+        out["bbox"] = (south, west, north, east)
+    if params.get("near"):
+        lat, lon = _floats(params["near"], 2, "near")
+        (radius,) = _floats(params.get("radius", str(DEFAULT_RADIUS_KM)), 1, "radius")
+        if not 0 < radius <= MAX_RADIUS_KM:
+            raise BadRequest(f"radius must be in (0, {MAX_RADIUS_KM:g}] km")
+        out["near"] = (lat, lon, radius)
+
+    try:
+        limit = int(params.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+    out["limit"] = max(1, min(limit, MAX_LIMIT))
+    out["cursor"] = params.get("cursor")
+
+    fields = [f for f in params.get("fields", "").split(",") if f]
+    unknown = [f for f in fields if f not in FIELDS]
+    if unknown:
+        raise BadRequest(f"unknown fields: {', '.join(unknown)}")
+    out["fields"] = fields or EXPORT_COLUMNS
+    return out
+
+
+# -------------------------------------------------------------------
+# QUERY
+# -------------------------------------------------------------------
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def query(df: pd.DataFrame, p: dict) -> dict:
+    version = df.attrs.get("version")
+    if df.empty:
+        # No rows for the selected provinces: nothing to index or page
+        return {
+            "version": version,
+            "total": 0,
+            "count": 0,
+            "next_cursor": None,
+            "items": pd.DataFrame(columns=p["fields"]),
+        }
+    positions = filter_positions(df, *p["filters"])
+    distance = None
+
+    if p["bbox"] is not None or p["near"] is not None:
+        index = get_grid_index(version, df)
+        if p["bbox"] is not None:
+            box = index.query(*p["bbox"])
+            positions = np.intersect1d(positions, box, assume_unique=True)
+        if p["near"] is not None:
+            lat, lon, radius = p["near"]
+            dlat = radius / 111.0
+            dlon = radius / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+            box = index.query(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+            positions = np.intersect1d(positions, box, assume_unique=True)
+            dist = _haversine_km(
+                lat, lon, df["lat"].to_numpy()[positions], df["lon"].to_numpy()[positions]
+            )
+            keep = dist <= radius
+            order = np.argsort(dist[keep], kind="stable")
+            positions = positions[keep][order]
+            distance = dist[keep][order]
+
+    offset = _cursor_offset(p["cursor"], version)
+    page = slice(offset, offset + p["limit"])
+    rows = df.iloc[positions[page]].reset_index(drop=True)
+    if distance is not None:
+        rows["distance_km"] = distance[page].round(3)
+    fields = [f for f in p["fields"] if f in rows.columns]
+
+    end = offset + len(rows)
+    return {
+        "version": version,
+        "total": int(len(positions)),
+        "count": int(len(rows)),
+        "next_cursor": _make_cursor(version, end) if end < len(positions) else None,
+        "items": rows[fields],
+    }
+
+
+def _encode(result: dict) -> bytes:
+    # Items go through pandas' C JSON writer; NaN becomes null
+    items = result.pop("items").to_json(orient="records", force_ascii=False)
+    head = json.dumps(result, separators=(",", ":"))[:-1]  # drop the closing brace
+    return f'{head},"items":{items}}}'.encode("utf-8")
+
+
+# -------------------------------------------------------------------
+# HTTP
+# -------------------------------------------------------------------
+def _etag(version: str, request) -> str:
+    # Same dataset version + same query => same body
+    params = sorted(request.query_params.multi_items())
+    digest = hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def _compressed(body: bytes, accept: str):
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    accept = accept.lower()
+    if brotli is not None and "br" in accept:
+        return brotli.compress(body, quality=4), "br"
+    if "gzip" in accept:
+        return gzip.compress(body, compresslevel=5), "gzip"
+    return body, None
+
+
+async def salons_endpoint(request):
+    try:
+        params = parse_params(request.query_params)
+    except BadRequest as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    df = await run_in_threadpool(load_data, params["provinces"])
+    etag = _etag(df.attrs.get("version"), request)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        result = await run_in_threadpool(query, df, params)
+    except BadRequest as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    body, encoding = _compressed(
+        _encode(result), request.headers.get("accept-encoding", "")
+    )
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def stats_endpoint(request):
+    return JSONResponse(
+        {
+            "filter_cache": FILTER_CACHE.stats(),
+            "tiles": tiles.stats,
+            "partitions": PARTITIONS.stats(),
+        }
+    )
+
+
+routes = [
+    Route(API_ROUTE, salons_endpoint),
+    Route(STATS_ROUTE, stats_endpoint),
+]
+app = Starlette(routes=routes)
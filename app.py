@@ -1,10 +1,52 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, time
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
+
+import numpy as np
 import streamlit as st
 import pandas as pd
-import requests
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import tiles
+from data import (
+    facet_counts,
+    filter_key,
+    filter_rows,
+    get_autocomplete,
+    get_density_points,
+    load_data,
+    open_now,
+    rank_rows,
+    search_bitmap,
+    sorted_page,
+)
+from density import DENSITY_MAX_ZOOM
+from exports import FORMATS, export, export_file_name
+from facets import TYPE_OPTIONS
+from opening_hours import DAY_NAMES, TIMEZONE, slot_of
+from partitions import DEFAULT_PROVINCES, PROVINCES
+from popups import POPUP_HTML_JS, popup_records, popup_url
+from metrics import (
+    METRICS_ROUTE,
+    run_spans,
+    span,
+    start_run,
+    summary,
+    write_textfile,
+)
+from profiling import PROFILE_ALL, profiled, session_profiles
+from ranking import TOP_K
+from search_box import search_box, suggest_url
 
-from streamlit_folium import st_folium
-import folium
-from folium.plugins import MarkerCluster
+# folium, its plugins and streamlit_folium take about half a second to
+# import, so they are imported where the map is built rather than here;
+# the page and sidebar render while they load on the first run.
+if TYPE_CHECKING:
+    import folium
 
 # -------------------------------------------------------------------
 # BASIC CONFIG
@@ -16,201 +58,75 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-OVERPASS_URL = "https://overpass-api.de/api/interpreter"
-
-NIAGARA_CITIES = [
-    "niagara falls",
-    "niagara-on-the-lake",
-    "st. catharines",
-    "st catharines",
-    "welland",
-    "thorold",
-    "pelham",
-    "grimsby",
-    "lincoln",
-    "fort erie",
-    "port colborne",
-    "wainfleet",
-    "west lincoln",
-]
-
-
-# -------------------------------------------------------------------
-# DATA LOAD FROM OVERPASS (CACHED FOR 24 HOURS)
-# -------------------------------------------------------------------
-@st.cache_data(show_spinner=True, ttl=60 * 60 * 24)
-def load_data() -> pd.DataFrame:
-    query = """
-    [out:json][timeout:600];
-    area["ISO3166-2"="CA-ON"]["boundary"="administrative"]->.a;
-    (
-      nwr["shop"="hairdresser"](area.a);
-      nwr["shop"="beauty"](area.a);
-      nwr["amenity"="spa"](area.a);
-      nwr(area.a)["name"~"(salon|saloon|barber)",i];
-    );
-    out center tags;
-    """
-    res = requests.post(OVERPASS_URL, data={"data": query})
-    res.raise_for_status()
-    elements = res.json().get("elements", [])
-
-    rows = []
-    for el in elements:
-        tags = el.get("tags", {})
-        center = el.get("center") or {}
-        lat = el.get("lat") or center.get("lat")
-        lon = el.get("lon") or center.get("lon")
-
-        houseno = tags.get("addr:housenumber")
-        street = tags.get("addr:street")
-        city = tags.get("addr:city")
-        postcode = tags.get("addr:postcode")
-        addr_parts = [p for p in [houseno, street, city, postcode] if p]
-        address = ", ".join(addr_parts) if addr_parts else tags.get("addr:full")
-
-        rows.append(
-            {
-                "osm_type": el.get("type"),
-                "osm_id": el.get("id"),
-                "name": tags.get("name"),
-                "shop": tags.get("shop") or tags.get("amenity"),
-                "phone": tags.get("phone") or tags.get("contact:phone"),
-                "website": tags.get("website") or tags.get("contact:website"),
-                "opening_hours": tags.get("opening_hours"),
-                "address": address,
-                "city": city,
-                "lat": lat,
-                "lon": lon,
-            }
-        )
-
-    df = pd.DataFrame(rows)
-    return df
+MAP_CENTER = [44, -79.5]
+MAP_ZOOM = 6
 
 
 # -------------------------------------------------------------------
-# FILTER LOGIC (SIMILAR TO YOUR NODE.JS MATCHING)
-# -------------------------------------------------------------------
-def matches(row, q: str, type_choice: str) -> bool:
-    name = (row.get("name") or "").lower()
-    city = (row.get("city") or "").lower()
-    full_addr = (row.get("address") or "").lower()
-    tag = (row.get("shop") or "").lower()
-    hay = " ".join([name, city, full_addr])
-
-    # Type filter
-    if type_choice != "All":
-        if type_choice.startswith("hairdresser"):
-            if tag != "hairdresser":
-                return False
-        elif type_choice.startswith("beauty"):
-            if tag != "beauty":
-                return False
-        elif type_choice.startswith("spa"):
-            if tag != "spa" and "spa" not in full_addr:
-                return False
-        elif "barber" in type_choice:
-            if "barber" not in name:
-                return False
-        elif "saloon" in type_choice:
-            if "saloon" not in name:
-                return False
-        elif "salon" in type_choice:
-            if "salon" not in name:
-                return False
-
-    # Text search
-    if q:
-        t = q.strip().lower()
-        if t == "niagara":
-            if not (
-                any(c in hay for c in NIAGARA_CITIES) or "niagara" in full_addr
-            ):
-                return False
-        else:
-            terms = [term for term in t.split() if term]
-            for term in terms:
-                if term not in hay:
-                    return False
-
-    return True
-
-
+# SALON MARKERS (USED WHEN ZOOMED IN)
 # -------------------------------------------------------------------
-# MAIN APP
-# -------------------------------------------------------------------
-def main():
-    st.title("Ontario Hair & Beauty Salon Finder")
-
-    # Sidebar filters
-    st.sidebar.header("Filters")
-    search = st.sidebar.text_input("Search by name / city / 'Niagara':", "")
-    type_filter = st.sidebar.selectbox(
-        "Filter by type (tag/name):",
+# Pin colour per shop tag; index 0 is the default
+MARKER_COLORS = ["blue", "pink", "purple", "green"]
+SHOP_COLOR = {"hairdresser": 1, "beauty": 2, "spa": 3}
+
+# Builds each pin from a [lat, lon, id, colour] row. The popup is made
+# from the id's record only when it is opened, so the page carries one
+# compact array instead of an HTML popup per marker.
+MARKER_CALLBACK = """(function () {
+    var records = %(records)s;
+    var colors = %(colors)s;
+    var popupHtml = %(popup_html)s;
+    return function (row) {
+        var marker = L.marker(new L.LatLng(row[0], row[1]));
+        marker.setIcon(L.AwesomeMarkers.icon({
+            icon: 'scissors', prefix: 'fa', iconColor: 'white',
+            markerColor: colors[row[3]]
+        }));
+        marker.bindPopup(function () { return popupHtml(records[row[2]]); });
+        return marker;
+    };
+})()"""
+
+
+def marker_data(filtered: pd.DataFrame) -> tuple:
+    # ([lat, lon, record index, colour index] per located row, records JSON)
+    located = filtered[filtered["lat"].notna() & filtered["lon"].notna()]
+    shops = located["shop"].map(lambda s: s.lower() if isinstance(s, str) else "")
+    rows = np.column_stack(
         [
-            "All",
-            "hairdresser (tag)",
-            "beauty (tag)",
-            "spa (tag)",
-            "barber (name)",
-            "salon (name)",
-            "saloon (name)",
-        ],
-    )
-    niagara_only = st.sidebar.checkbox("Show only Niagara Region", value=False)
-
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("**Location marker:**")
-    st.sidebar.markdown(
-        "Click anywhere on the map to drop a blue **\"You are here\"** marker."
-    )
-
-    st.caption("Loading data from Overpass (first call can be slow)…")
+            located["lat"].round(6).to_numpy(),
+            located["lon"].round(6).to_numpy(),
+            np.arange(len(located)),
+            shops.map(SHOP_COLOR).fillna(0).to_numpy(),
+        ]
+    ).tolist()
+    for row in rows:
+        row[2], row[3] = int(row[2]), int(row[3])
+    return rows, json.dumps(popup_records(located), ensure_ascii=False)
 
-    try:
-        df = load_data()
-    except Exception as e:
-        st.error(f"Failed to load data: {e}")
-        return
 
-    if df.empty:
-        st.warning("No data returned from Overpass.")
-        return
+# Per filter key, so map-only reruns (pans, zooms) reuse the payload
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_marker_data(key: tuple, _filtered: pd.DataFrame) -> tuple:
+    return marker_data(_filtered)
 
-    # Apply search + type filter
-    filtered = df[df.apply(lambda r: matches(r, search, type_filter), axis=1)]
 
-    # Niagara-only additional filter
-    if niagara_only:
-        mask = filtered["city"].fillna("").str.lower().apply(
-            lambda x: any(n in x for n in NIAGARA_CITIES) or "niagara" in x
-        )
-        filtered = filtered[mask]
+def add_markers(m: folium.Map, filtered: pd.DataFrame, key: tuple | None = None):
+    from folium.plugins import FastMarkerCluster
 
-    st.write(f"Showing **{len(filtered):,}** locations")
-
-    # -------------------------------------------------------------------
-    # BUILD FOLIUM MAP (LOCKED DARK TILES)
-    # -------------------------------------------------------------------
-    m = folium.Map(
-        location=[44, -79.5],
-        zoom_start=6,
-        tiles=None,          # disable default light layer
-        control_scale=True,
+    rows, records = (
+        marker_data(filtered) if key is None else get_marker_data(key, filtered)
     )
 
-    # Dark basemap – no flashing back to light on zoom
-    folium.TileLayer(
-        tiles="https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png",
-        attr="&copy; OpenStreetMap &copy; CARTO",
-        name="Dark",
-        control=False,
-        opacity=1.0,
-    ).add_to(m)
-
     # Colorful clusters: green < 50, amber 50–200, red 200+
-    cluster = MarkerCluster(
+    FastMarkerCluster(
+        rows,
+        callback=MARKER_CALLBACK
+        % {
+            "records": records.replace("</", "<\\/"),
+            "colors": json.dumps(MARKER_COLORS),
+            "popup_html": POPUP_HTML_JS.strip(),
+        },
         icon_create_function="""
             function (cluster) {
                 var count = cluster.getChildCount();
@@ -234,63 +150,210 @@ def main():
                     iconSize: new L.Point(40, 40)
                 });
             }
-        """
+        """,
+        control=False,
     ).add_to(m)
 
-    # Helper: marker color by shop type (for single pins when zoomed in)
-    def marker_color(shop_tag: str) -> str:
-        shop_tag = (shop_tag or "").lower()
-        if shop_tag == "hairdresser":
-            return "pink"
-        if shop_tag == "beauty":
-            return "purple"
-        if shop_tag == "spa":
-            return "green"
-        return "blue"
-
-    # Add salon markers
-    for _, row in filtered.iterrows():
-        lat, lon = row["lat"], row["lon"]
-        if pd.isna(lat) or pd.isna(lon):
-            continue
-
-        name = row["name"] or "Unknown"
-        address = row["address"] or ""
-        phone = row["phone"] or ""
-        website = row["website"]
-        osm_type = row["osm_type"]
-        osm_id = row["osm_id"]
-
-        popup_lines = [f"<b>{name}</b>"]
-        if address:
-            popup_lines.append(address)
-        if phone:
-            popup_lines.append(f"📞 {phone}")
-
-        links = []
-        if website:
-            links.append(
-                f'<a href="{website}" target="_blank" rel="noopener">Website</a>'
-            )
-        if osm_type and osm_id:
-            links.append(
-                f'<a href="https://www.openstreetmap.org/{osm_type}/{osm_id}" '
-                f'target="_blank" rel="noopener">OSM</a>'
-            )
-        if links:
-            popup_lines.append(" · ".join(links))
 
-        popup_html = "<br>".join(popup_lines)
+# -------------------------------------------------------------------
+# SALON VECTOR TILES (WHEN SERVED THROUGH server.py)
+# -------------------------------------------------------------------
+# Same colours as the marker cluster and pins above, but points are
+# fetched per tile from TILE_ROUTE so the page itself carries no data.
+TILE_STYLE = """{
+    rendererFactory: L.canvas.tile,
+    interactive: true,
+    maxNativeZoom: %(max_zoom)d,
+    vectorTileLayerStyles: {
+        %(layer)s: function (p) {
+            if (p.count) {
+                var color = p.count >= 200 ? '#e53935'
+                    : p.count >= 50 ? '#ffb300' : '#4caf50';
+                return {
+                    radius: 8 + Math.min(Math.log2(p.count) * 2, 14),
+                    fill: true, fillColor: color, fillOpacity: 0.9,
+                    color: 'white', weight: 2
+                };
+            }
+            var colors = {hairdresser: '#e91e63', beauty: '#9c27b0', spa: '#4caf50'};
+            return {
+                radius: 6, fill: true, fillOpacity: 0.95,
+                fillColor: colors[(p.shop || '').toLowerCase()] || '#2196f3',
+                color: 'white', weight: 1.5
+            };
+        }
+    }
+}"""
+
+
+# Popups for single salons (fetched by id), zoom-in for clusters
+TILE_POPUPS = """
+    {% macro script(this, kwargs) %}
+    {{ this.layer.get_name() }}.on('click', function (e) {
+        var map = {{ this.map.get_name() }};
+        var p = e.layer.properties;
+        if (p.count) {
+            map.setView(e.latlng, map.getZoom() + 2);
+            return;
+        }
+        var popupHtml = {{ this.popup_html }};
+        var popup = L.popup().setLatLng(e.latlng).setContent('…').openOn(map);
+        fetch({{ this.popup_url|tojson }}.replace('{id}', p.id))
+            .then(function (r) { return r.ok ? r.json() : null; })
+            .then(function (record) {
+                popup.setContent(record ? popupHtml(record) : 'Details unavailable');
+            });
+    });
+    {% endmacro %}
+    """
 
-        folium.Marker(
-            [lat, lon],
-            popup=popup_html,
-            icon=folium.Icon(
-                color=marker_color(row.get("shop")),
-                icon="scissors",
-                prefix="fa",
-            ),
-        ).add_to(cluster)
+
+def add_tile_layer(m: folium.Map, url: str, popups_url: str):
+    from branca.element import MacroElement
+    from folium.plugins import VectorGridProtobuf
+    from folium.template import Template
+
+    layer = VectorGridProtobuf(
+        url,
+        name="Salons",
+        options=TILE_STYLE
+        % {"max_zoom": tiles.MAX_ZOOM, "layer": tiles.LAYER_NAME},
+        control=False,
+    ).add_to(m)
+    popups = MacroElement()
+    popups._template = Template(TILE_POPUPS)
+    popups.layer, popups.map = layer, m
+    popups.popup_url, popups.popup_html = popups_url, POPUP_HTML_JS.strip()
+    m.add_child(popups)
+
+
+# -------------------------------------------------------------------
+# PAGINATED DATA TABLE
+# -------------------------------------------------------------------
+PAGE_SIZES = [25, 50, 100, 250]
+RESULT_ORDER = "(result order)"
+
+
+def show_table(df: pd.DataFrame, rows: pd.DataFrame, columns: list, rows_key: tuple):
+    sortable = [c for c in columns if c in df.columns]
+    sort_col, order_col, size_col, page_col = st.columns(4)
+    sort_by = sort_col.selectbox("Sort by:", [RESULT_ORDER] + sortable)
+    descending = order_col.selectbox(
+        "Order:", ["Ascending", "Descending"], disabled=sort_by == RESULT_ORDER
+    ) == "Descending"
+    page_size = size_col.selectbox("Rows per page:", PAGE_SIZES, index=1)
+
+    # Back to the first page whenever the result set changes
+    pages = max(1, -(-len(rows) // page_size))
+    if st.session_state.get("table_rows_key") != rows_key:
+        st.session_state["table_rows_key"] = rows_key
+        st.session_state["table_page"] = 1
+    elif st.session_state.get("table_page", 1) > pages:
+        st.session_state["table_page"] = pages
+    page = page_col.number_input("Page:", 1, pages, key="table_page")
+
+    start = (page - 1) * page_size
+    stop = min(start + page_size, len(rows))
+    if sort_by == RESULT_ORDER:
+        visible = rows.iloc[start:stop]
+    else:
+        positions = sorted_page(
+            df, rows.index.to_numpy(), sort_by, descending, start, stop
+        )
+        visible = rows.loc[positions]
+
+    st.dataframe(visible[columns])
+    st.caption(f"Rows {start + 1 if stop else 0:,}–{stop:,} of {len(rows):,}")
+
+
+# -------------------------------------------------------------------
+# MAIN APP
+# -------------------------------------------------------------------
+def with_count(label: str, count: int | None) -> str:
+    return label if count is None else f"{label} — {count:,}"
+
+
+def recenter_map():
+    # A new province selection starts from a view of those provinces
+    codes = st.session_state["provinces"]
+    if codes:
+        st.session_state["map_center"] = [
+            sum(PROVINCES[c][1] for c in codes) / len(codes),
+            sum(PROVINCES[c][2] for c in codes) / len(codes),
+        ]
+        st.session_state["map_zoom"] = MAP_ZOOM if len(codes) == 1 else 4
+
+
+# -------------------------------------------------------------------
+# MAP (FOLIUM, LOCKED DARK TILES)
+# -------------------------------------------------------------------
+# A fragment: panning, zooming and clicking rerun only this function, with
+# the filtered rows from the last full run, so the map can report its view
+# on every pan without recomputing facets, filters or the table.
+@st.fragment
+def show_map(
+    df: pd.DataFrame,
+    filtered: pd.DataFrame,
+    key: tuple,
+    map_view: str,
+    search: str,
+    type_filter: str,
+    niagara_only: bool,
+    open_slot,
+    require: tuple,
+    provinces: tuple,
+):
+    zoom = st.session_state.get("map_zoom", MAP_ZOOM)
+    center = st.session_state.get("map_center", MAP_CENTER)
+    show_density = map_view == "Density" or (
+        map_view == "Auto" and zoom <= DENSITY_MAX_ZOOM
+    )
+
+    import folium
+    from folium.plugins import HeatMap
+    from streamlit_folium import st_folium
+
+    m = folium.Map(
+        location=MAP_CENTER,
+        zoom_start=MAP_ZOOM,
+        tiles=None,          # disable default light layer
+        control_scale=True,
+    )
+
+    # Dark basemap – no flashing back to light on zoom
+    folium.TileLayer(
+        tiles="https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png",
+        attr="&copy; OpenStreetMap &copy; CARTO",
+        name="Dark",
+        control=False,
+        opacity=1.0,
+    ).add_to(m)
+
+    with span("map_layers"):
+        if show_density:
+            # Binned on the server; payload depends on zoom, not on row count
+            HeatMap(
+                get_density_points(key, int(zoom), filtered),
+                radius=18,
+                blur=14,
+                min_opacity=0.3,
+            ).add_to(m)
+        elif tiles.SERVING:
+            add_tile_layer(
+                m,
+                tiles.tile_url(
+                    df.attrs["version"],
+                    search,
+                    type_filter,
+                    niagara_only,
+                    open_slot,
+                    require,
+                    provinces,
+                ),
+                popup_url(df.attrs["version"], provinces),
+            )
+        else:
+            add_markers(m, filtered, key)
 
     # -------------------------------------------------------------------
     # USER LOCATION MARKER (CLICK-TO-SET)
@@ -305,12 +368,32 @@ def main():
         ).add_to(m)
 
     # Render map and capture interactions
-    st_data = st_folium(
-        m,
-        width=1100,
-        height=650,
-        returned_objects=["last_clicked"],
-    )
+    with span("st_folium"):
+        st_data = st_folium(
+            m,
+            center=center,
+            zoom=zoom,
+            width=1100,
+            height=650,
+            returned_objects=["last_clicked", "zoom", "center"],
+        )
+
+    # Remember the view so switching between density and markers keeps it
+    if st_data and st_data.get("zoom") is not None:
+        st.session_state["map_zoom"] = st_data["zoom"]
+        if st_data.get("center"):
+            st.session_state["map_center"] = [
+                st_data["center"]["lat"],
+                st_data["center"]["lng"],
+            ]
+        new_density = map_view == "Density" or (
+            map_view == "Auto" and st_data["zoom"] <= DENSITY_MAX_ZOOM
+        )
+        if new_density != show_density:
+            # Only the map changes; a fragment-scoped rerun is not allowed
+            # during a full run, which reruns everything anyway
+            ctx = get_script_run_ctx()
+            st.rerun(scope="fragment" if ctx and ctx.fragment_ids_this_run else "app")
 
     # If user clicked on the map, update their location in session_state
     if st_data and st_data.get("last_clicked"):
@@ -321,23 +404,241 @@ def main():
             f"Location marker set at **({click_lat:.4f}, {click_lon:.4f})** — click again to move it."
         )
 
+
+def main():
+    st.title("Ontario Hair & Beauty Salon Finder")
+
+    # Loaded per province and combined; see partitions.py
+    provinces = tuple(
+        sorted(
+            st.sidebar.multiselect(
+                "Provinces / territories:",
+                list(PROVINCES),
+                default=list(DEFAULT_PROVINCES),
+                format_func=lambda c: PROVINCES[c][0],
+                key="provinces",
+                on_change=recenter_map,
+            )
+        )
+    )
+
+    # Sidebar filters
+    st.sidebar.header("Filters")
+    # Filled in once the data is loaded, so the search box can suggest
+    # names / cities and the options can show counts
+    search_box_slot = st.sidebar.empty()
+    type_box = st.sidebar.empty()
+    niagara_box = st.sidebar.empty()
+    phone_box = st.sidebar.empty()
+    website_box = st.sidebar.empty()
+    hours_filter = st.sidebar.selectbox(
+        "Opening hours:",
+        ["Any time", "Open now", "Open at…"],
+        help="Uses the OSM opening_hours tag, in each salon's local time; "
+        "salons without parseable hours are hidden when filtering by time.",
+    )
+    open_slot = None
+    if hours_filter == "Open now":
+        open_slot = open_now(provinces)
+    elif hours_filter == "Open at…":
+        timezone = ZoneInfo(PROVINCES[provinces[0]][3]) if provinces else TIMEZONE
+        day = st.sidebar.selectbox(
+            "Day:",
+            range(7),
+            index=datetime.now(timezone).weekday(),
+            format_func=lambda d: DAY_NAMES[d],
+        )
+        at = st.sidebar.time_input("Time:", value=time(10, 0), step=15 * 60)
+        open_slot = slot_of(day, at.hour, at.minute)
+    map_view = st.sidebar.radio(
+        "Map view:",
+        ["Auto", "Markers", "Density"],
+        horizontal=True,
+        help=f"Auto shows a density heatmap up to zoom {DENSITY_MAX_ZOOM} "
+        "and individual markers when zoomed in further.",
+    )
+
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("**Location marker:**")
+    st.sidebar.markdown(
+        "Click anywhere on the map to drop a blue **\"You are here\"** marker."
+    )
+
+    st.caption("Loading data from Overpass (first call can be slow)…")
+
+    if not provinces:
+        st.info("Choose at least one province or territory in the sidebar.")
+        return
+
+    df, error = None, None
+    try:
+        with span("load_data"):
+            df = load_data(provinces)
+    except Exception as e:
+        error = e
+
+    loaded = df is not None and not df.empty
+    with search_box_slot.container():
+        search = search_box(
+            "Search by name / city / 'Niagara':",
+            lambda typed: (
+                get_autocomplete(df.attrs.get("version"), df).complete(typed)
+                if loaded
+                else []
+            ),
+            # Served next to the app: suggestions without a rerun
+            suggest_url=(
+                suggest_url(df.attrs["version"], provinces)
+                if loaded and tiles.SERVING
+                else None
+            ),
+        )
+
+    # Result counts for each option under the other current filters
+    counts = {"types": {}, "niagara": None, "has_phone": None, "has_website": None}
+    require = tuple(f for f in ("has_phone", "has_website") if st.session_state.get(f))
+    if loaded:
+        if search.strip():
+            # Narrow this session's previous result when the query was only
+            # extended, instead of rescanning every row
+            with span("search"):
+                found = search_bitmap(
+                    df, search, st.session_state.get("last_search")
+                )
+            q = filter_key(df, search, "All", False)[1]
+            st.session_state["last_search"] = (df.attrs.get("version"), q, found)
+        with span("facet_counts"):
+            counts = facet_counts(
+                df,
+                search,
+                st.session_state.get("type_filter", "All"),
+                st.session_state.get("niagara_only", False),
+                open_slot,
+                require,
+            )
+    type_filter = type_box.selectbox(
+        "Filter by type (tag/name):",
+        TYPE_OPTIONS,
+        format_func=lambda t: with_count(t, counts["types"].get(t)),
+        key="type_filter",
+    )
+    niagara_only = niagara_box.checkbox(
+        with_count("Show only Niagara Region", counts["niagara"]),
+        value=False,
+        key="niagara_only",
+    )
+    phone_box.checkbox(
+        with_count("Has a phone number", counts["has_phone"]), key="has_phone"
+    )
+    website_box.checkbox(
+        with_count("Has a website", counts["has_website"]), key="has_website"
+    )
+
+    if error is not None:
+        st.error(f"Failed to load data: {error}")
+        return
+
+    if df.empty:
+        st.warning("No data returned from Overpass.")
+        return
+
+    with span("filter"):
+        filtered = filter_rows(
+            df, search, type_filter, niagara_only, open_slot, require
+        )
+        key = filter_key(df, search, type_filter, niagara_only, open_slot, require)
+
+    st.write(f"Showing **{len(filtered):,}** locations")
+
+    show_map(
+        df, filtered, key, map_view, search, type_filter, niagara_only,
+        open_slot, require, provinces,
+    )
+
     # -------------------------------------------------------------------
     # TABLE + CSV DOWNLOAD
     # -------------------------------------------------------------------
-    with st.expander("Show data table"):
+    sort_by = st.radio(
+        "Sort results by:",
+        ["Map order", "Relevance"],
+        horizontal=True,
+        disabled=not search.strip(),
+        help=f"Relevance puts the {TOP_K:,} best matches for the search first "
+        "(name counts more than city, city more than address).",
+    )
+    rows, rows_key = filtered, key
+    columns = ["name", "shop", "address", "city", "phone", "website", "opening_hours"]
+    if sort_by == "Relevance" and search.strip():
+        with span("rank"):
+            rows, rows_key = rank_rows(df, search, filtered), key + ("relevance",)
+        columns = ["relevance"] + columns
+
+    # Only built while the expander is open, and only the visible page
+    table = st.expander("Show data table", key="table_open", on_change="rerun")
+    if table.open:
+        with table, span("table"):
+            show_table(df, rows, columns, rows_key)
+
+    export_col, button_col = st.columns([1, 3], vertical_alignment="bottom")
+    fmt = export_col.selectbox(
+        "Export format:", list(FORMATS), format_func=lambda f: FORMATS[f][0]
+    )
+    # Built only when clicked (on a worker thread) and cached per filter key
+    button_col.download_button(
+        f"Download filtered {FORMATS[fmt][0]}",
+        lambda: export(rows_key, fmt, rows),
+        file_name=export_file_name(fmt),
+        mime=FORMATS[fmt][2],
+        on_click="ignore",
+    )
+
+
+# -------------------------------------------------------------------
+# DEBUG PANEL (?debug=1)
+# -------------------------------------------------------------------
+def show_debug_panel():
+    with st.sidebar.expander("Debug: rerun timings", expanded=True):
         st.dataframe(
-            filtered[
-                ["name", "shop", "address", "city", "phone", "website", "opening_hours"]
-            ]
+            pd.DataFrame(
+                run_spans(), columns=["stage", "wall ms", "cpu ms", "alloc bytes"]
+            ).round(2),
+            hide_index=True,
         )
+        st.caption("Since server start (p50 / p95):")
+        st.dataframe(pd.DataFrame(summary()), hide_index=True)
+        st.caption(f"Prometheus text format at `{METRICS_ROUTE}` (server.py).")
 
-    st.download_button(
-        "Download filtered CSV",
-        filtered.to_csv(index=False),
-        file_name="ontario_salons_filtered.csv",
-        mime="text/csv",
-    )
+
+# -------------------------------------------------------------------
+# PROFILES (?profile=1 or SALONS_PROFILE=1)
+# -------------------------------------------------------------------
+def show_profiles(session: str):
+    paths = session_profiles(session)
+    if not paths:
+        return
+    with st.sidebar.expander("Profile: last rerun"):
+        with open(paths[0], "rb") as f:
+            st.download_button(
+                "Download flame graph stacks",
+                f.read(),
+                file_name=os.path.basename(paths[0]),
+                mime="text/plain",
+            )
+        st.caption(
+            f"{len(paths)} profile(s) kept for this session. Open in "
+            "speedscope.app or run flamegraph.pl on the file."
+        )
 
 
 if __name__ == "__main__":
-    main()
+    ctx = get_script_run_ctx()
+    session = ctx.session_id if ctx else "script"
+    profiling = PROFILE_ALL or st.query_params.get("profile") == "1"
+    start_run()
+    with profiled(profiling, session), span("rerun"):
+        main()
+    if st.query_params.get("debug") == "1":
+        show_debug_panel()
+    if profiling:
+        show_profiles(session)
+    write_textfile()
@@ -0,0 +1,82 @@
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------------
+# PREFIX AUTOCOMPLETE (SORTED ARRAY, RANKED BY FREQUENCY)
+# -------------------------------------------------------------------
+# Distinct salon names, streets and cities, normalized and sorted once per
+# dataset. A prefix is the contiguous run of keys between two binary
+# searches; the most frequent keys in that run are picked with a partial
+# sort, so a lookup never touches the DataFrame and costs the same for
+# "s" as for "sunny salon".
+MAX_SUGGESTIONS = 8
+MAX_KEYS = 250_000       # least frequent values are dropped beyond this
+MAX_KEY_CHARS = 64
+PUNCTUATION = r"[^\w\s]"
+
+
+def normalize(text: pd.Series) -> pd.Series:
+    # Lowercase, punctuation dropped, single spaces: "St. Catharines" and
+    # "st catharines" are the same key
+    return (
+        text.str.lower()
+        .str.replace(PUNCTUATION, "", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def normalize_prefix(prefix: str) -> str:
+    return " ".join(re.sub(PUNCTUATION, "", prefix.lower()).split())
+
+
+class PrefixIndex:
+    def __init__(self, columns: dict, max_keys: int = MAX_KEYS):
+        # columns: kind ("name", "city", ...) -> values; on a tie between
+        # kinds for the same key, the first kind listed wins
+        values = pd.concat(
+            [
+                pd.DataFrame({"label": pd.Series(v, dtype=object), "kind": kind})
+                for kind, v in columns.items()
+            ],
+            ignore_index=True,
+        )
+        values = values[values["label"].map(lambda v: isinstance(v, str))]
+
+        # Exact duplicates (cities, chains) are collapsed before any string work
+        distinct = values.groupby("label", sort=False).agg(
+            kind=("kind", "first"), count=("kind", "size")
+        )
+        label = distinct.index.to_series()
+        label = label.str.replace(r"\s+", " ", regex=True).str.strip()
+        distinct = distinct.assign(
+            label=label.to_numpy(), key=normalize(label).str[:MAX_KEY_CHARS].to_numpy()
+        )
+        entries = distinct[distinct["key"] != ""].groupby("key", sort=True).agg(
+            label=("label", "first"), kind=("kind", "first"), count=("count", "sum")
+        )
+        if len(entries) > max_keys:
+            entries = entries.nlargest(max_keys, "count", keep="first").sort_index()
+
+        self.keys = entries.index.tolist()
+        self.labels = entries["label"].tolist()
+        self.kinds = entries["kind"].tolist()
+        self.counts = entries["count"].to_numpy(dtype=np.int64)
+
+    def complete(self, prefix: str, limit: int = MAX_SUGGESTIONS) -> list:
+        # [(label, kind), ...], most frequent first, then alphabetical
+        p = normalize_prefix(prefix)
+        if not p:
+            return []
+        lo = bisect_left(self.keys, p)
+        hi = bisect_left(self.keys, p + "\uffff", lo)
+        if hi - lo > limit:
+            picked = np.argpartition(-self.counts[lo:hi], limit - 1)
+            positions = picked[:limit] + lo
+        else:
+            positions = np.arange(lo, hi)
+        positions = sorted(positions.tolist(), key=lambda i: (-self.counts[i], i))
+        return [(self.labels[i], self.kinds[i]) for i in positions]
@@ -0,0 +1,81 @@
+# Concurrency load test for the JSON API (api.py), fully local.
+#
+#   python benchmarks/bench_api.py
+#
+# Starts the API on a local port with a synthetic dataset and reports
+# throughput and p50/p99 latency per concurrency level and query type.
+import http.client
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api  # noqa: E402
+from bench_tiles import synthetic_frame  # noqa: E402
+
+ROWS = 20_000
+PORT = 8765
+REQUESTS_PER_LEVEL = 200
+CONCURRENCY = [1, 8, 32]
+QUERIES = {
+    "page": "/api/salons?limit=100",
+    "search": "/api/salons?q=salon+1&limit=100&fields=name,city",
+    "bbox": "/api/salons?bbox=-80,43,-79,44&limit=100",
+    "near": "/api/salons?near=43.65,-79.38&radius=10&limit=50",
+}
+
+
+def serve():
+    config = uvicorn.Config(api.app, port=PORT, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def worker(path: str, count: int):
+    conn = http.client.HTTPConnection("127.0.0.1", PORT)
+    latencies = []
+    for _ in range(count):
+        t0 = time.perf_counter()
+        conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+        resp = conn.getresponse()
+        resp.read()
+        assert resp.status == 200, resp.status
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+    return latencies
+
+
+def main():
+    df = synthetic_frame(ROWS, np.random.default_rng(3))
+    api.load_data = lambda *args: df
+    server = serve()
+
+    print(f"{ROWS:,} rows")
+    print(f"{'query':>8} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, path in QUERIES.items():
+        worker(path, 5)  # warm caches
+        for conc in CONCURRENCY:
+            per = REQUESTS_PER_LEVEL // conc
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(conc) as pool:
+                results = list(pool.map(lambda _: worker(path, per), range(conc)))
+            elapsed = time.perf_counter() - t0
+            lat = np.concatenate(results) * 1000
+            print(
+                f"{name:>8} {conc:>5} {len(lat) / elapsed:>8.0f} "
+                f"{np.percentile(lat, 50):>8.1f} {np.percentile(lat, 99):>8.1f}"
+            )
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
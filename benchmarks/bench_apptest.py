@@ -0,0 +1,157 @@
+# End-to-end rerun latency of app.py under Streamlit's AppTest, with
+# load_data() replaced by a synthetic Overpass fixture. Each scripted
+# interaction is one rerun; time and peak memory are reported per
+# interaction and dataset size. With --baseline it is a regression gate:
+# the exit code is 1 if any interaction got slower than the tolerance.
+#
+#   python benchmarks/bench_apptest.py
+#   python benchmarks/bench_apptest.py --sizes 10000 --baseline old.json
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import data  # noqa: E402
+from bench_pipeline import RESULTS_DIR, git_commit  # noqa: E402
+from overpass_fixture import synthetic_overpass  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+APP = os.path.join(ROOT, "app.py")
+TIMEOUT = 300
+
+
+def _sidebar_select(label: str, value):
+    def act(at):
+        next(s for s in at.sidebar.selectbox if s.label == label).set_value(value)
+    return act
+
+
+def _set_state(key: str, value):
+    def act(at):
+        at.session_state[key] = value
+    return act
+
+
+# (name, action on the AppTest before its rerun)
+INTERACTIONS = [
+    ("first load", None),
+    ("type search", _set_state("search", {"value": "salon"})),
+    ("refine search", _set_state("search", {"value": "salon toronto"})),
+    ("type filter", lambda at: at.selectbox(key="type_filter").select_index(1)),
+    ("toggle niagara", lambda at: at.checkbox(key="niagara_only").check()),
+    ("untoggle niagara", lambda at: at.checkbox(key="niagara_only").uncheck()),
+    ("open now", _sidebar_select("Opening hours:", "Open now")),
+    # st_folium cannot be clicked headlessly; this is the rerun a click
+    # causes once the clicked location is stored
+    ("click map", _set_state("user_location", (43.65, -79.38))),
+    ("open table", _set_state("table_open", True)),
+    ("next page", lambda at: at.number_input(key="table_page").set_value(2)),
+    ("clear search", _set_state("search", {"value": ""})),
+]
+
+
+def run_script(memory: bool) -> list:
+    at = AppTest.from_file(APP, default_timeout=TIMEOUT)
+    out = []
+    for name, action in INTERACTIONS:
+        if action is not None:
+            action(at)
+        if memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        at.run()
+        seconds = time.perf_counter() - t0
+        peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+        out.append({"interaction": name, "seconds": round(seconds, 4), "peak_bytes": peak})
+    return out
+
+
+def run_size(n: int, repeat: int, memory: bool) -> dict:
+    df = data.normalize_elements(synthetic_overpass(n, seed=n)["elements"])
+    data.load_data = lambda *args: df  # app.py imports it from data on every run
+
+    # Best of `repeat` timed runs, then one traced run for peak memory
+    runs = [run_script(memory=False) for _ in range(repeat)]
+    steps = [
+        min((r[i] for r in runs), key=lambda s: s["seconds"])
+        for i in range(len(INTERACTIONS))
+    ]
+    if memory:
+        for step, traced in zip(steps, run_script(memory=True)):
+            step["peak_bytes"] = traced["peak_bytes"]
+    return {"elements": n, "rows": len(df), "interactions": steps}
+
+
+def check_baseline(results: dict, baseline_path: str, tolerance: float) -> bool:
+    with open(baseline_path) as f:
+        baseline = {r["elements"]: r for r in json.load(f)["results"]}
+    ok = True
+    print(f"\nvs {baseline_path} (fails above {tolerance:.2f}x)")
+    for r in results["results"]:
+        old = baseline.get(r["elements"])
+        if old is None:
+            continue
+        old_steps = {s["interaction"]: s for s in old["interactions"]}
+        for step in r["interactions"]:
+            prev = old_steps.get(step["interaction"])
+            if not prev or not prev["seconds"]:
+                continue
+            ratio = step["seconds"] / prev["seconds"]
+            flag = "FAIL" if ratio > tolerance else "ok"
+            ok &= ratio <= tolerance
+            print(f"{r['elements']:>10,} {step['interaction']:>18} {ratio:>6.2f}x {flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/)")
+    parser.add_argument("--baseline", help="earlier results file to gate against")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    args = parser.parse_args()
+
+    results = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "results": [],
+    }
+    print(f"{'elements':>10} {'interaction':>18} {'ms':>9} {'peak MB':>9}")
+    for n in args.sizes:
+        r = run_size(n, args.repeat, not args.no_memory)
+        results["results"].append(r)
+        for step in r["interactions"]:
+            peak = step["peak_bytes"]
+            print(
+                f"{n:>10,} {step['interaction']:>18} {step['seconds'] * 1000:>9.1f} "
+                f"{peak / 1e6 if peak is not None else float('nan'):>9.1f}"
+            )
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"apptest-{results['created'][:19].replace(':', '')}.json"
+    )
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nsaved {out}")
+    if args.baseline and not check_baseline(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
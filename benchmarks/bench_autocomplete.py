@@ -0,0 +1,74 @@
+# Autocomplete build time, memory and lookup latency for every 1-4
+# character prefix seen in the data.
+#
+#   python benchmarks/bench_autocomplete.py
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autocomplete import PrefixIndex  # noqa: E402
+
+SIZES = [10_000, 100_000, 1_000_000]
+LOOKUPS = 5_000
+WORDS = ["Sunny", "Glow", "Cut", "Style", "Studio", "Beauty", "Hair", "Nail", "Barber", "Salon"]
+STREETS = ["King St", "Queen St", "Main St", "Yonge St", "Dundas St", "Bloor St W", "Lakeshore Rd"]
+CITIES = ["Toronto", "Ottawa", "Hamilton", "St. Catharines", "Welland", "London", "Kingston"]
+
+
+def synthetic_columns(n: int, rng: np.random.Generator) -> dict:
+    first = rng.choice(WORDS, n)
+    second = rng.choice(WORDS, n)
+    suffix = rng.integers(0, n // 4 + 1, n)
+    names = [f"{a} {b} {s}" for a, b, s in zip(first, second, suffix)]
+    streets = [f"{s} {i % 50}" for i, s in enumerate(rng.choice(STREETS, n))]
+    return {
+        "name": names,
+        "city": rng.choice(CITIES, n).tolist(),
+        "street": streets,
+    }
+
+
+def main():
+    rng = np.random.default_rng(7)
+    print(
+        f"{'values':>10} {'keys':>9} {'build s':>8} {'MB':>6} {'peak MB':>8} "
+        f"{'p50 us':>7} {'p99 us':>7} {'max us':>7}"
+    )
+    for n in SIZES:
+        columns = synthetic_columns(n, rng)
+
+        t0 = time.perf_counter()
+        PrefixIndex(columns)
+        build = time.perf_counter() - t0
+
+        # Retained size of the index (what every session shares) and the
+        # peak while building it
+        tracemalloc.start()
+        index = PrefixIndex(columns)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        sample = rng.choice(columns["name"] + columns["city"], LOOKUPS)
+        lengths = rng.integers(1, 5, LOOKUPS)
+        times = []
+        for text, k in zip(sample, lengths):
+            t0 = time.perf_counter()
+            index.complete(text[:k])
+            times.append((time.perf_counter() - t0) * 1e6)
+        times = np.array(times)
+
+        print(
+            f"{n:>10,} {len(index.keys):>9,} {build:>8.2f} {retained / 1e6:>6.1f} "
+            f"{peak / 1e6:>8.1f} "
+            f"{np.percentile(times, 50):>7.0f} {np.percentile(times, 99):>7.0f} "
+            f"{times.max():>7.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
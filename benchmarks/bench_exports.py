@@ -0,0 +1,36 @@
+# Size and write time per export format at province scale.
+#
+#   python benchmarks/bench_exports.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exports import FORMATS  # noqa: E402
+from bench_tiles import synthetic_frame  # noqa: E402
+
+SIZES = [20_000, 100_000]
+REPEATS = 3
+
+
+def main():
+    rng = np.random.default_rng(11)
+    for n in SIZES:
+        df = synthetic_frame(n, rng)
+        print(f"\n{n:,} rows")
+        print(f"{'format':>12} {'MB':>8} {'write ms':>10} {'MB/s':>8}")
+        for fmt, (label, _, _, writer, _) in FORMATS.items():
+            best = float("inf")
+            for _ in range(REPEATS):
+                t0 = time.perf_counter()
+                body = writer(df)
+                best = min(best, time.perf_counter() - t0)
+            mb = len(body) / 1e6
+            print(f"{label:>12} {mb:>8.2f} {best * 1000:>10.1f} {mb / best:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Grid index vs. naive boolean mask for bbox queries.
+#
+#   python benchmarks/bench_grid_index.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grid_index import GridIndex  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUERIES = 200
+
+# Rough Ontario extent
+SOUTH, WEST, NORTH, EAST = 41.7, -95.2, 56.9, -74.3
+
+
+def synthetic_points(n: int, rng: np.random.Generator):
+    # Mostly clustered around a few "cities" like the real data, plus noise
+    centers = rng.uniform([42.5, -83.0], [46.5, -75.5], size=(40, 2))
+    k = int(n * 0.9)
+    pick = centers[rng.integers(0, len(centers), k)]
+    clustered = pick + rng.normal(0, 0.08, size=(k, 2))
+    noise = rng.uniform([SOUTH, WEST], [NORTH, EAST], size=(n - k, 2))
+    pts = np.vstack([clustered, noise])
+    return pts[:, 0], pts[:, 1]
+
+
+def random_bboxes(rng: np.random.Generator, count: int):
+    # City- to region-sized boxes
+    size = rng.uniform(0.05, 1.5, count)
+    s = rng.uniform(42.0, 46.0, count)
+    w = rng.uniform(-83.0, -76.0, count)
+    return np.column_stack([s, w, s + size, w + size * 1.4])
+
+
+def main():
+    rng = np.random.default_rng(42)
+    boxes = random_bboxes(rng, QUERIES)
+
+    print(f"{'rows':>10} {'build ms':>10} {'mask ms':>10} {'index ms':>10} {'speedup':>8}")
+    for n in SIZES:
+        lat, lon = synthetic_points(n, rng)
+
+        t0 = time.perf_counter()
+        index = GridIndex(lat, lon)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        for s, w, no, e in boxes:
+            naive = np.flatnonzero((lat >= s) & (lat <= no) & (lon >= w) & (lon <= e))
+        mask_ms = (time.perf_counter() - t0) * 1000 / QUERIES
+
+        for s, w, no, e in boxes:
+            hits = index.query(s, w, no, e)
+        index_ms = index.stats["total_ms"] / index.stats["queries"]
+
+        # sanity check on the last box
+        assert np.array_equal(naive, hits)
+
+        print(
+            f"{n:>10,} {build_ms:>10.1f} {mask_ms:>10.3f} {index_ms:>10.3f} "
+            f"{mask_ms / index_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Scaling of data.normalize_elements() with worker processes on synthetic
+# Overpass elements (default 1M). Every worker count must produce the same
+# dataset version as the single-process run.
+#
+#   python benchmarks/bench_normalize.py
+#   python benchmarks/bench_normalize.py --elements 200000 --workers 1 2 4
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import data  # noqa: E402
+from overpass_fixture import synthetic_overpass  # noqa: E402
+
+
+def default_workers() -> list:
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--elements", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers())
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    elements = synthetic_overpass(args.elements, seed=1)["elements"]
+    print(f"{args.elements:,} elements generated in {time.perf_counter() - t0:.1f}s, "
+          f"{os.cpu_count()} cores")
+    # Always split, even below the size where the app would stay in-process
+    data.PARALLEL_MIN_ELEMENTS = 0
+
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}  version")
+    base = version = None
+    for workers in args.workers:
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            df = data.normalize_elements(elements, workers)
+            best = min(best, time.perf_counter() - t0)
+        base = base or best
+        version = version or df.attrs["version"]
+        same = "" if df.attrs["version"] == version else "  MISMATCH"
+        print(f"{workers:>8} {best:>9.2f} {base / best:>7.2f}x  {df.attrs['version']}{same}")
+
+
+if __name__ == "__main__":
+    main()
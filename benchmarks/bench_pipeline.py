@@ -0,0 +1,161 @@
+# Pipeline stage timings and peak memory on synthetic Overpass responses,
+# saved as JSON so runs can be compared. Fully offline.
+#
+#   python benchmarks/bench_pipeline.py                       # 1k .. 1M
+#   python benchmarks/bench_pipeline.py --sizes 1000 10000 --compare old.json
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import folium
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+import data  # noqa: E402
+from exports import FORMATS  # noqa: E402
+from filter_cache import FILTER_CACHE  # noqa: E402
+from overpass_fixture import synthetic_overpass  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+SEARCH = "salon toronto"
+TYPE_FILTER = "hairdresser (tag)"
+
+
+def measure(fn, repeat: int, memory: bool) -> dict:
+    # Best-of-repeat wall time, then one traced run for peak memory
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    out = {"seconds": round(best, 6)}
+    if memory:
+        tracemalloc.start()
+        fn()
+        out["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return out
+
+
+def build_indexes(df: pd.DataFrame):
+    version = df.attrs["version"]
+    for get in (data.get_grid_index, data.get_facets, data.get_search_index):
+        get.clear()
+        get(version, df)
+
+
+def cold_filter(df: pd.DataFrame):
+    FILTER_CACHE.clear()
+    return data.filter_positions(df, SEARCH, TYPE_FILTER, False, None)
+
+
+def run_size(n: int, repeat: int, memory: bool) -> dict:
+    raw = json.dumps(synthetic_overpass(n, seed=n)).encode()
+    elements = json.loads(raw)["elements"]
+    df = data.normalize_elements(elements)
+    build_indexes(df)
+    filtered = df.iloc[cold_filter(df)]
+
+    stages = {
+        "parse": lambda: json.loads(raw),
+        "normalize": lambda: data.normalize_elements(elements),
+        "indexes": lambda: build_indexes(df),
+        "filter_matches": lambda: df.apply(
+            lambda r: data.matches(r, SEARCH, TYPE_FILTER), axis=1
+        ),
+        "filter": lambda: cold_filter(df),
+        "markers": lambda: app.add_markers(folium.Map(), filtered),
+        "csv_export": lambda: FORMATS["csv"][3](df),
+    }
+    result = {"elements": n, "rows": len(df), "filtered_rows": len(filtered)}
+    for name, fn in stages.items():
+        # The slow baselines only run once at the larger sizes
+        result[name] = measure(fn, 1 if n >= 100_000 else repeat, memory)
+    result["json_bytes"] = len(raw)
+    return result
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, previous_path: str):
+    with open(previous_path) as f:
+        previous = {r["elements"]: r for r in json.load(f)["results"]}
+    print(f"\nvs {previous_path} (new / old wall time)")
+    for r in results["results"]:
+        old = previous.get(r["elements"])
+        if old is None:
+            continue
+        ratios = [
+            f"{stage} {r[stage]['seconds'] / old[stage]['seconds']:.2f}x"
+            for stage in r
+            if isinstance(r[stage], dict) and "seconds" in r[stage]
+            and isinstance(old.get(stage), dict) and old[stage].get("seconds")
+        ]
+        print(f"{r['elements']:>10,}  " + "  ".join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "search": SEARCH,
+        "type_filter": TYPE_FILTER,
+        "results": [],
+    }
+    print(f"{'elements':>10} {'stage':>15} {'seconds':>9} {'peak MB':>9}")
+    for n in args.sizes:
+        r = run_size(n, args.repeat, not args.no_memory)
+        results["results"].append(r)
+        for stage, m in r.items():
+            if isinstance(m, dict):
+                peak = m.get("peak_bytes")
+                print(
+                    f"{n:>10,} {stage:>15} {m.get('seconds', float('nan')):>9.4f} "
+                    f"{peak / 1e6 if peak is not None else float('nan'):>9.1f}"
+                )
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"pipeline-{results['created'][:19].replace(':', '')}.json"
+    )
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nsaved {out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Size of what the browser receives for the salon layer at province scale:
+# the rendered map page with embedded markers (plain `streamlit run`), and
+# vector tiles at street zoom (server.py). Run it on two commits to compare.
+#
+#   python benchmarks/bench_popups.py
+#   python benchmarks/bench_popups.py --sizes 20000 --zoom 15
+import argparse
+import gzip
+import os
+import sys
+import time
+
+import folium
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+import data  # noqa: E402
+import tiles  # noqa: E402
+from bench_tiles import tiles_around  # noqa: E402
+from overpass_fixture import synthetic_overpass  # noqa: E402
+
+SIZES = [20_000, 50_000]    # about Ontario's salons today, and headroom
+TILE_SAMPLE = 200
+
+
+def page_bytes(df) -> tuple:
+    m = folium.Map(location=app.MAP_CENTER, zoom_start=app.MAP_ZOOM, tiles=None)
+    t0 = time.perf_counter()
+    app.add_markers(m, df)
+    html = m.get_root().render().encode()
+    return len(html), len(gzip.compress(html, 6)), time.perf_counter() - t0
+
+
+def tile_bytes(df, z: int) -> tuple:
+    index = data.get_grid_index(df.attrs["version"], df)
+    coords = tiles_around(df, z, TILE_SAMPLE, np.random.default_rng(0))
+    sizes = []
+    for x, y in coords:
+        s, w, n, e = tiles.tile_bounds(z, x, y)
+        pad_lat = (n - s) * tiles.BUFFER / tiles.EXTENT
+        pad_lon = (e - w) * tiles.BUFFER / tiles.EXTENT
+        positions = index.query(s - pad_lat, w - pad_lon, n + pad_lat, e + pad_lon)
+        sizes.append(len(tiles.build_tile(df, positions, z, x, y)))
+    return len(sizes), float(np.mean(sizes)), int(np.sum(sizes))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--zoom", type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'page MB':>9} {'gzip MB':>9} {'build s':>8}"
+          f" {'tiles':>6} {'tile avg B':>11} {'tiles MB':>9}")
+    for n in args.sizes:
+        df = data.normalize_elements(synthetic_overpass(n, seed=n)["elements"])
+        raw, packed, seconds = page_bytes(df)
+        count, mean, total = tile_bytes(df, args.zoom)
+        print(f"{n:>8,} {raw / 1e6:>9.2f} {packed / 1e6:>9.2f} {seconds:>8.2f}"
+              f" {count:>6} {mean:>11.0f} {total / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
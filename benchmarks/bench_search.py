@@ -0,0 +1,66 @@
+# Keystroke-to-result latency while a query is typed one character at a
+# time, with and without refining the previous keystroke's result.
+#
+#   python benchmarks/bench_search.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data  # noqa: E402
+from bench_tiles import synthetic_frame  # noqa: E402
+from filter_cache import FILTER_CACHE  # noqa: E402
+
+ROWS = 50_000
+QUERIES = ["st cath salon", "toronto barber 12", "main st"]
+CITIES = ["St. Catharines", "Toronto", "Ottawa", "Welland", "Hamilton", ""]
+
+
+def keystrokes(query: str):
+    # Every prefix that changes the normalized query, as the user types it
+    seen = []
+    for i in range(1, len(query) + 1):
+        q = " ".join(query[:i].split())
+        if q and (not seen or seen[-1] != q):
+            seen.append(q)
+    return seen
+
+
+def type_query(df, query: str, incremental: bool):
+    version = df.attrs["version"]
+    previous = None
+    times = []
+    for q in keystrokes(query):
+        t0 = time.perf_counter()
+        found = data.search_bitmap(df, q, previous if incremental else None)
+        times.append((time.perf_counter() - t0) * 1000)
+        previous = (version, q, found)
+    return np.array(times)
+
+
+def main():
+    rng = np.random.default_rng(7)
+    df = synthetic_frame(ROWS, rng)
+    df["city"] = rng.choice(CITIES, len(df))
+    df["name"] = np.where(
+        rng.random(len(df)) < 0.3, "Barber " + df["osm_id"].astype(str), df["name"]
+    )
+
+    print(f"{ROWS:,} rows, ms per keystroke")
+    print(f"{'query':<20} {'keys':>5} {'full avg':>9} {'full max':>9} {'incr avg':>9} {'incr max':>9}")
+    for query in QUERIES:
+        FILTER_CACHE.clear()
+        full = type_query(df, query, incremental=False)
+        FILTER_CACHE.clear()
+        incr = type_query(df, query, incremental=True)
+        print(
+            f"{query:<20} {len(full):>5} {full.mean():>9.1f} {full.max():>9.1f} "
+            f"{incr.mean():>9.1f} {incr.max():>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
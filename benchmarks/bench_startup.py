@@ -0,0 +1,97 @@
+# Cold-start import cost of app.py from `python -X importtime`, in a fresh
+# interpreter per run. Reports total wall time, the slowest top-level
+# imports, and whether the map libraries stayed out of start-up.
+#
+#   python benchmarks/bench_startup.py
+#   python benchmarks/bench_startup.py --repeat 10 --compare old.json
+import argparse
+import datetime
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_pipeline import RESULTS_DIR, git_commit  # noqa: E402
+
+# Imported on first map render, not at start-up (app.py)
+DEFERRED = ["folium", "folium.plugins", "streamlit_folium", "requests"]
+TOP = 15
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_profile(module: str) -> dict:
+    # One fresh interpreter: wall time, and cumulative µs for each module the
+    # target imports directly (one indent level below it)
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode:
+        raise RuntimeError(proc.stderr[-2000:])
+    # Children are listed before their parent, so collect each run of
+    # one-level-down lines and keep it when the parent is the target
+    top, children, loaded = {}, {}, set()
+    for m in LINE.finditer(proc.stderr):
+        loaded.add(m.group(4))
+        if len(m.group(3)) == 2:
+            children[m.group(4)] = int(m.group(2))
+        elif not m.group(3):
+            if m.group(4) == module:
+                top = children
+            children = {}
+    return {"wall": wall, "top": top, "loaded": loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="results file (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    # Best of `repeat` by wall time; the first run also warms the disk cache
+    runs = [import_profile(args.module) for _ in range(args.repeat)]
+    best = min(runs, key=lambda r: r["wall"])
+    top = sorted(best["top"].items(), key=lambda kv: -kv[1])[:TOP]
+    results = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "module": args.module,
+        "wall_seconds": round(best["wall"], 4),
+        "import_seconds": round(sum(best["top"].values()) / 1e6, 4),
+        "top_imports": {name: us / 1e6 for name, us in top},
+        "deferred_loaded": [m for m in DEFERRED if m in best["loaded"]],
+    }
+
+    print(f"import {args.module}: {results['wall_seconds'] * 1000:.0f} ms wall, "
+          f"{results['import_seconds'] * 1000:.0f} ms in imports")
+    for name, seconds in results["top_imports"].items():
+        print(f"  {name:<40} {seconds * 1000:>8.1f} ms")
+    if results["deferred_loaded"]:
+        print("imported at start-up but meant to be deferred: "
+              + ", ".join(results["deferred_loaded"]))
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"startup-{results['created'][:19].replace(':', '')}.json"
+    )
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nsaved {out}")
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print(f"vs {args.compare}: wall {results['wall_seconds'] / old['wall_seconds']:.2f}x, "
+              f"imports {results['import_seconds'] / old['import_seconds']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
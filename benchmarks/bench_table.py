@@ -0,0 +1,59 @@
+# Cost of the data table per rerun at 50k filtered rows: the whole frame
+# serialized for st.dataframe (before) against one sorted page (after).
+#
+#   python benchmarks/bench_table.py
+import os
+import sys
+import time
+
+import numpy as np
+from streamlit.dataframe_util import convert_anything_to_arrow_bytes
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data  # noqa: E402
+from bench_tiles import synthetic_frame  # noqa: E402
+
+ROWS = 50_000
+PAGE_SIZE = 50
+REPEAT = 20
+COLUMNS = ["name", "shop", "address", "city", "phone", "website", "opening_hours"]
+
+
+def timed(fn):
+    fn()  # warm up (builds the sort order once)
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        out = fn()
+    return (time.perf_counter() - t0) / REPEAT * 1000, out
+
+
+def main():
+    rng = np.random.default_rng(7)
+    df = synthetic_frame(ROWS, rng)
+    positions = np.arange(len(df))
+
+    def full_frame():
+        return convert_anything_to_arrow_bytes(df[COLUMNS])
+
+    def result_order_page():
+        return convert_anything_to_arrow_bytes(df.iloc[:PAGE_SIZE][COLUMNS])
+
+    def sorted_page():
+        page = data.sorted_page(df, positions, "name", True, 0, PAGE_SIZE)
+        return convert_anything_to_arrow_bytes(df.loc[page][COLUMNS])
+
+    print(f"{ROWS:,} filtered rows, page of {PAGE_SIZE}")
+    print(f"{'table':<28} {'ms':>8} {'KB sent':>9}")
+    for label, fn in [
+        ("full frame (before)", full_frame),
+        ("page, result order", result_order_page),
+        ("page, sorted by name desc", sorted_page),
+        ("expander closed", lambda: b""),
+    ]:
+        ms, out = timed(fn)
+        print(f"{label:<28} {ms:>8.2f} {len(out) / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
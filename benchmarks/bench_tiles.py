@@ -0,0 +1,83 @@
+# Vector tile generation throughput (tiles/sec), cold and from the LRU.
+#
+#   python benchmarks/bench_tiles.py
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data  # noqa: E402
+import tiles  # noqa: E402
+from bench_grid_index import synthetic_points  # noqa: E402
+
+ROWS = 100_000
+ZOOMS = [6, 9, 12, 14, 16]
+TILES_PER_ZOOM = 200
+
+
+def synthetic_frame(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    lat, lon = synthetic_points(n, rng)
+    df = pd.DataFrame(
+        {
+            "osm_type": "node",
+            "osm_id": np.arange(n),
+            "name": [f"Salon {i}" for i in range(n)],
+            "shop": rng.choice(["hairdresser", "beauty", "spa"], n),
+            "phone": None,
+            "website": None,
+            "opening_hours": None,
+            "address": "1 Main St",
+            "city": None,
+            "lat": lat,
+            "lon": lon,
+        }
+    )
+    return data.index_rows(df)
+
+
+def tiles_around(df: pd.DataFrame, z: int, count: int, rng: np.random.Generator):
+    # Tiles that contain data, picked by sampling rows
+    n = 2 ** z
+    rows = df.iloc[rng.integers(0, len(df), count)]
+    lat_r = np.radians(rows["lat"].to_numpy())
+    xs = ((rows["lon"].to_numpy() + 180) / 360 * n).astype(int)
+    ys = ((1 - np.log(np.tan(lat_r) + 1 / np.cos(lat_r)) / math.pi) / 2 * n).astype(int)
+    return sorted(set(zip(xs.tolist(), ys.tolist())))
+
+
+def main():
+    rng = np.random.default_rng(7)
+    df = synthetic_frame(ROWS, rng)
+    tiles.load_data = lambda *args: df
+    tiles.TILE_CACHE_DIR = tempfile.mkdtemp(prefix="tiles-bench-")
+
+    print(f"{ROWS:,} rows")
+    print(f"{'zoom':>5} {'tiles':>6} {'cold t/s':>10} {'lru t/s':>10} {'avg KB':>8}")
+    for z in ZOOMS:
+        coords = tiles_around(df, z, TILES_PER_ZOOM, rng)
+        tiles._tiles.clear()
+
+        t0 = time.perf_counter()
+        # filtered variant so nothing is served from the disk cache
+        sizes = [len(tiles.get_tile(z, x, y, type_filter="All", search="salon")) for x, y in coords]
+        cold = len(coords) / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        for x, y in coords:
+            tiles.get_tile(z, x, y, type_filter="All", search="salon")
+        warm = len(coords) / (time.perf_counter() - t0)
+
+        print(
+            f"{z:>5} {len(coords):>6} {cold:>10.0f} {warm:>10.0f} "
+            f"{np.mean(sizes) / 1024:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
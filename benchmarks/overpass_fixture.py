@@ -0,0 +1,129 @@
+# Synthetic Overpass API responses shaped like the salon query in
+# data.load_data(): same element types, tag keys and rough proportions,
+# clustered around real Ontario cities. Deterministic for a given seed.
+#
+#   python benchmarks/overpass_fixture.py 10000 > overpass_10k.json
+import json
+import sys
+
+import numpy as np
+
+# city, lat, lon, share of salons
+CITIES = [
+    ("Toronto", 43.6532, -79.3832, 0.30),
+    ("Ottawa", 45.4215, -75.6972, 0.09),
+    ("Mississauga", 43.5890, -79.6441, 0.07),
+    ("Brampton", 43.7315, -79.7624, 0.06),
+    ("Hamilton", 43.2557, -79.8711, 0.05),
+    ("London", 42.9849, -81.2453, 0.04),
+    ("Markham", 43.8561, -79.3370, 0.03),
+    ("Vaughan", 43.8361, -79.4983, 0.03),
+    ("Kitchener", 43.4516, -80.4925, 0.03),
+    ("Windsor", 42.3149, -83.0364, 0.03),
+    ("St. Catharines", 43.1594, -79.2469, 0.02),
+    ("Niagara Falls", 43.0896, -79.0849, 0.015),
+    ("Welland", 42.9918, -79.2483, 0.01),
+    ("Oshawa", 43.8971, -78.8658, 0.02),
+    ("Barrie", 44.3894, -79.6903, 0.02),
+    ("Guelph", 43.5448, -80.2482, 0.015),
+    ("Kingston", 44.2312, -76.4860, 0.015),
+    ("Sudbury", 46.4917, -80.9930, 0.015),
+    ("Thunder Bay", 48.3809, -89.2477, 0.01),
+    ("Peterborough", 44.3091, -78.3197, 0.01),
+    ("Grimsby", 43.2001, -79.5660, 0.005),
+    ("Fort Erie", 42.9018, -78.9722, 0.005),
+]
+STREETS = [
+    "Yonge Street", "King Street West", "Queen Street East", "Dundas Street West",
+    "Main Street", "Bloor Street West", "College Street", "Bank Street",
+    "Rideau Street", "Ontario Street", "Lakeshore Road", "Highway 7",
+    "Eglinton Avenue West", "St. Clair Avenue", "Danforth Avenue", "Weston Road",
+]
+NAME_WORDS = [
+    "Glow", "Luxe", "Studio", "Bella", "Urban", "Classic", "Elite", "Pure", "Velvet",
+    "Golden", "Royal", "Modern", "Fresh", "Divine", "Serenity", "Chic", "Sharp",
+]
+# (tag key, tag value, name suffix, share): the four parts of the query
+KINDS = [
+    ("shop", "hairdresser", ["Hair Salon", "Hair Studio", "Salon", "Hair Design"], 0.55),
+    ("shop", "beauty", ["Beauty", "Nails", "Esthetics", "Beauty Bar", "Lash Studio"], 0.27),
+    ("amenity", "spa", ["Spa", "Day Spa", "Wellness Spa"], 0.05),
+    ("shop", "hairdresser", ["Barber Shop", "Barbers", "Barbershop"], 0.08),
+    (None, None, ["Salon", "Saloon", "Barber", "Tanning Salon"], 0.05),  # name-only
+]
+OTHER_SHOPS = ["nails", "cosmetics", "tattoo", "massage", None]
+OPENING_HOURS = [
+    "Mo-Fr 09:00-18:00; Sa 09:00-17:00",
+    "Tu-Sa 10:00-19:00",
+    "Mo-Sa 09:00-21:00; Su 11:00-18:00",
+    "Mo-Fr 10:00-20:00; Sa 09:00-18:00; Su off",
+    "Tu-Fr 09:30-17:30; Sa 08:30-16:00",
+    "We-Su 11:00-19:00",
+    "24/7",
+    "Mo-Su 10:00-22:00",
+]
+
+
+def synthetic_overpass(n: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    shares = np.array([c[3] for c in CITIES])
+    city_idx = rng.choice(len(CITIES), n, p=shares / shares.sum())
+    kind_shares = np.array([k[3] for k in KINDS])
+    kind_idx = rng.choice(len(KINDS), n, p=kind_shares / kind_shares.sum())
+    element_type = rng.choice(["node", "way", "relation"], n, p=[0.8, 0.19, 0.01])
+    spread = rng.normal(0, 0.06, size=(n, 2))
+    has = rng.random((n, 7))  # independent draws for optional tags
+
+    elements = []
+    for i in range(n):
+        city, lat, lon, _ = CITIES[city_idx[i]]
+        key, value, suffixes, _ = KINDS[kind_idx[i]]
+        lat = round(lat + spread[i, 0], 7)
+        lon = round(lon + spread[i, 1] * 1.4, 7)
+
+        words = NAME_WORDS[i % len(NAME_WORDS)]
+        suffix = suffixes[(i // len(NAME_WORDS)) % len(suffixes)]
+        tags = {"name": f"{words} {suffix}"} if has[i, 0] < 0.96 else {}
+        if key is not None:
+            tags[key] = value
+        else:
+            other = OTHER_SHOPS[i % len(OTHER_SHOPS)]
+            if other:
+                tags["shop"] = other
+            tags["name"] = f"{words} {suffix}"
+
+        if has[i, 1] < 0.6:
+            tags["addr:housenumber"] = str(1 + (i * 37) % 2400)
+            tags["addr:street"] = STREETS[(i * 7) % len(STREETS)]
+            if has[i, 2] < 0.85:
+                tags["addr:city"] = city
+            if has[i, 3] < 0.5:
+                tags["addr:postcode"] = f"L{i % 10}{chr(65 + i % 26)} {i % 10}A{i % 7}"
+        elif has[i, 1] < 0.65:
+            tags["addr:full"] = f"{1 + i % 900} {STREETS[i % len(STREETS)]}, {city}"
+        if has[i, 4] < 0.5:
+            phone_key = "phone" if has[i, 4] < 0.4 else "contact:phone"
+            tags[phone_key] = f"+1 {416 + i % 300} 555 {i % 10000:04d}"
+        if has[i, 5] < 0.35:
+            tags["website"] = f"https://{words.lower()}-{i}.example.ca"
+        if has[i, 6] < 0.3:
+            tags["opening_hours"] = OPENING_HOURS[i % len(OPENING_HOURS)]
+
+        el = {"type": element_type[i], "id": 10_000_000 + i}
+        if element_type[i] == "node":
+            el["lat"], el["lon"] = lat, lon
+        else:
+            el["center"] = {"lat": lat, "lon": lon}
+        el["tags"] = tags
+        elements.append(el)
+
+    return {
+        "version": 0.6,
+        "generator": "Overpass API (synthetic)",
+        "osm3s": {"copyright": "synthetic fixture"},
+        "elements": elements,
+    }
+
+
+if __name__ == "__main__":
+    json.dump(synthetic_overpass(int(sys.argv[1])), sys.stdout)
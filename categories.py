@@ -0,0 +1,140 @@
+import hashlib
+import os
+import re
+import tomllib
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------------
+# CATEGORY CONFIG (categories.toml)
+# -------------------------------------------------------------------
+CATEGORIES_FILE = os.environ.get(
+    "SALONS_CATEGORIES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "categories.toml"),
+)
+ID = re.compile(r"[a-z0-9_]+")
+RULE_LISTS = ("tags", "names", "addresses", "exclude_tags", "exclude_names")
+
+
+def _pair(rule: str, where: str) -> tuple:
+    key, sep, value = rule.partition("=")
+    if not sep or not key or not value:
+        raise ValueError(f"{where}: expected key=value, got {rule!r}")
+    return key.strip(), value.strip().lower()
+
+
+class Category:
+    def __init__(self, spec: dict):
+        self.id = spec.get("id", "")
+        if not ID.fullmatch(self.id):
+            raise ValueError(f"category id must match {ID.pattern}: {self.id!r}")
+        self.label = spec.get("label") or self.id
+        self.column = f"cat_{self.id}"
+        where = f"category {self.id!r}"
+        unknown = set(spec) - {"id", "label", *RULE_LISTS}
+        if unknown:
+            raise ValueError(f"{where}: unknown keys {sorted(unknown)}")
+
+        self.tags = [_pair(r, where) for r in spec.get("tags", [])]
+        self.names = [n.lower() for n in spec.get("names", [])]
+        self.addresses = [a.lower() for a in spec.get("addresses", [])]
+        self.exclude_tags = [_pair(r, where) for r in spec.get("exclude_tags", [])]
+        self.exclude_names = [n.lower() for n in spec.get("exclude_names", [])]
+        if not (self.tags or self.names or self.addresses):
+            raise ValueError(f"{where}: needs tags, names or addresses")
+
+
+def load_categories(path: str = CATEGORIES_FILE) -> list:
+    with open(path, "rb") as f:
+        categories = [Category(spec) for spec in tomllib.load(f).get("category", [])]
+    for attr in ("id", "label"):
+        values = [getattr(c, attr) for c in categories]
+        if len(set(values)) != len(values):
+            raise ValueError(f"{path}: duplicate category {attr}s")
+    return categories
+
+
+CATEGORIES = load_categories()
+CATEGORY_COLUMNS = {c.label: c.column for c in CATEGORIES}
+# Raw OSM keys the rules look at; normalize_elements keeps them as tag:<key>
+TAG_KEYS = sorted({k for c in CATEGORIES for k, _ in c.tags + c.exclude_tags})
+# Changes whenever the rules do, so data fetched under other rules is not reused
+CATEGORIES_VERSION = hashlib.sha1(
+    repr([(c.id, *(getattr(c, r) for r in RULE_LISTS)) for c in CATEGORIES]).encode()
+).hexdigest()[:8]
+
+
+# -------------------------------------------------------------------
+# OVERPASS SELECTION
+# -------------------------------------------------------------------
+def _ql(value: str) -> str:
+    # Overpass QL string literal contents
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def overpass_selectors(area: str = "area.a") -> str:
+    # Union members for every element a category could match. Exclusions
+    # and address rules only apply in memory, since one category's
+    # exclusion must not hide the element from another.
+    lines, seen = [], set()
+    for c in CATEGORIES:
+        for key, value in c.tags:
+            if (key, value) not in seen:
+                seen.add((key, value))
+                lines.append(f'nwr["{_ql(key)}"="{_ql(value)}"]({area});')
+    names = sorted({n for c in CATEGORIES for n in c.names})
+    if names:
+        pattern = "|".join(re.escape(n) for n in names)
+        lines.append(f'nwr({area})["name"~"({_ql(pattern)})",i];')
+    return "\n".join(lines)
+
+
+# -------------------------------------------------------------------
+# VECTORIZED CLASSIFIERS
+# -------------------------------------------------------------------
+def lower_text(df: pd.DataFrame, col: str) -> pd.Series:
+    return df[col].fillna("").astype(str).str.lower()
+
+
+def _tag_values(df: pd.DataFrame, key: str, cache: dict) -> pd.Series:
+    # Frames from before tag:<key> columns existed only have "shop", which
+    # holds the shop tag or, failing that, the amenity tag
+    if key not in cache:
+        column = f"tag:{key}"
+        if column not in df and key in ("shop", "amenity"):
+            column = "shop"
+        cache[key] = (
+            lower_text(df, column) if column in df
+            else pd.Series("", index=df.index)
+        )
+    return cache[key]
+
+
+def _contains(text: pd.Series, words: list) -> np.ndarray:
+    if len(words) == 1:
+        return text.str.contains(words[0], regex=False).to_numpy(dtype=bool)
+    pattern = "|".join(re.escape(w) for w in words)
+    return text.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+
+
+def classify(df: pd.DataFrame) -> dict:
+    # Category column name -> boolean mask over the rows of df
+    name = lower_text(df, "name")
+    address = lower_text(df, "address")
+    tags = {}
+    out = {}
+    for c in CATEGORIES:
+        mask = np.zeros(len(df), dtype=bool)
+        for key, value in c.tags:
+            mask |= (_tag_values(df, key, tags) == value).to_numpy()
+        if c.names:
+            mask |= _contains(name, c.names)
+        if c.addresses:
+            mask |= _contains(address, c.addresses)
+        for key, value in c.exclude_tags:
+            mask &= (_tag_values(df, key, tags) != value).to_numpy()
+        if c.exclude_names:
+            mask &= ~_contains(name, c.exclude_names)
+        out[c.column] = mask
+    return out
@@ -0,0 +1,617 @@
+import hashlib
+import multiprocessing as mp
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlencode
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from pyroaring import FrozenBitMap
+
+from autocomplete import PrefixIndex
+from categories import (
+    CATEGORIES_VERSION,
+    CATEGORY_COLUMNS,
+    TAG_KEYS,
+    classify,
+    overpass_selectors,
+)
+from density import density_bins, heat_points
+from facets import REQUIRE_FLAGS, FacetIndex
+from filter_cache import FILTER_CACHE, to_positions
+from grid_index import GridIndex, cell_ids
+from opening_hours import WEEK_SLOTS, compile_schedules, now_slot
+from partitions import DEFAULT_PROVINCES, PARTITION_DIR, PROVINCES, PartitionStore
+from ranking import TOP_K, SearchIndex
+
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+
+NIAGARA_CITIES = [
+    "niagara falls",
+    "niagara-on-the-lake",
+    "st. catharines",
+    "st catharines",
+    "welland",
+    "thorold",
+    "pelham",
+    "grimsby",
+    "lincoln",
+    "fort erie",
+    "port colborne",
+    "wainfleet",
+    "west lincoln",
+]
+
+
+# -------------------------------------------------------------------
+# DATA LOAD FROM OVERPASS (PER PROVINCE, SEE partitions.py)
+# -------------------------------------------------------------------
+# The union inside the parentheses comes from categories.toml
+OVERPASS_QUERY = """
+[out:json][timeout:600];
+area["ISO3166-2"="%(area)s"]["boundary"="administrative"]->.a;
+(
+%(selectors)s
+);
+out center tags;
+"""
+
+
+def fetch_province(code: str, workers: int | None = None) -> pd.DataFrame:
+    import requests  # only needed on a cache miss; keeps app start-up lean
+
+    query = OVERPASS_QUERY % {"area": code, "selectors": overpass_selectors()}
+    res = requests.post(OVERPASS_URL, data={"data": query})
+    res.raise_for_status()
+    elements = res.json().get("elements", [])
+    df = normalize_elements(elements, NORMALIZE_WORKERS if workers is None else workers)
+    df["province"] = code
+    return df
+
+
+# Partitions fetched under other category rules are kept apart
+PARTITIONS = PartitionStore(
+    fetch_province, os.path.join(PARTITION_DIR, CATEGORIES_VERSION)
+)
+
+
+# Combined frame for a set of provinces (sorted ISO codes), cached for 24
+# hours; the partitions themselves are shared between selections. Each
+# entry is a full copy outside SALONS_PARTITION_BYTES, so only the two most
+# recent selections are kept (as for the per-version indexes below).
+@st.cache_data(show_spinner=True, ttl=60 * 60 * 24, max_entries=2)
+def load_data(provinces: tuple = DEFAULT_PROVINCES) -> pd.DataFrame:
+    frames = [f for f in PARTITIONS.get_many(provinces) if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return index_rows(frames[0].copy())
+    return index_rows(pd.concat(frames, ignore_index=True))
+
+
+# -------------------------------------------------------------------
+# NORMALIZATION (OVERPASS ELEMENTS -> COLUMNS)
+# -------------------------------------------------------------------
+# One Arrow record batch per slice of elements. Large inputs are split
+# across worker processes: forked workers read their slice of the parent's
+# list directly and send back columnar batches, so neither direction
+# pickles individual rows.
+ELEMENT_SCHEMA = pa.schema(
+    [
+        ("osm_type", pa.string()),
+        ("osm_id", pa.int64()),
+        ("name", pa.string()),
+        ("shop", pa.string()),
+        ("phone", pa.string()),
+        ("website", pa.string()),
+        ("opening_hours", pa.string()),
+        ("address", pa.string()),
+        ("street", pa.string()),
+        ("city", pa.string()),
+        ("lat", pa.float64()),
+        ("lon", pa.float64()),
+    ]
+    # Raw values of the keys categories.toml rules look at
+    + [(f"tag:{key}", pa.string()) for key in TAG_KEYS]
+)
+NORMALIZE_WORKERS = int(os.environ.get("SALONS_NORMALIZE_WORKERS", os.cpu_count() or 1))
+PARALLEL_MIN_ELEMENTS = 200_000   # below this, process start-up costs more
+TASKS_PER_WORKER = 4
+
+
+def element_batch(elements: list) -> pa.RecordBatch:
+    rows = []
+    for el in elements:
+        tags = el.get("tags", {})
+        center = el.get("center") or {}
+        lat = el.get("lat") or center.get("lat")
+        lon = el.get("lon") or center.get("lon")
+
+        houseno = tags.get("addr:housenumber")
+        street = tags.get("addr:street")
+        city = tags.get("addr:city")
+        postcode = tags.get("addr:postcode")
+        addr_parts = [p for p in [houseno, street, city, postcode] if p]
+        address = ", ".join(addr_parts) if addr_parts else tags.get("addr:full")
+
+        rows.append(
+            (
+                el.get("type"),
+                el.get("id"),
+                tags.get("name"),
+                tags.get("shop") or tags.get("amenity"),
+                tags.get("phone") or tags.get("contact:phone"),
+                tags.get("website") or tags.get("contact:website"),
+                tags.get("opening_hours"),
+                address,
+                street,
+                city,
+                lat,
+                lon,
+                *(tags.get(key) for key in TAG_KEYS),
+            )
+        )
+
+    columns = list(zip(*rows)) or [[] for _ in ELEMENT_SCHEMA]
+    return pa.record_batch(
+        [pa.array(col, type=field.type) for col, field in zip(columns, ELEMENT_SCHEMA)],
+        schema=ELEMENT_SCHEMA,
+    )
+
+
+_worker_elements = None  # this worker's list, set by _set_elements
+
+
+def _set_elements(elements: list):
+    # Pool initializer: under fork the argument is inherited, not pickled,
+    # and each pool has its own, so concurrent loads cannot see each other's
+    global _worker_elements
+    _worker_elements = elements
+
+
+def _element_slice(bounds: tuple) -> pa.RecordBatch:
+    start, stop = bounds
+    return element_batch(_worker_elements[start:stop])
+
+
+def element_batches(elements: list, workers: int = NORMALIZE_WORKERS) -> list:
+    # Needs fork so workers share the parent's list; elsewhere (or for
+    # small inputs) this is a single batch in-process. Forking a process
+    # with other threads running (the Streamlit / uvicorn server) can
+    # deadlock on locks those threads hold, so only a single-threaded
+    # process splits: `python data.py` (see the bottom of this file).
+    if (
+        workers <= 1
+        or len(elements) < PARALLEL_MIN_ELEMENTS
+        or "fork" not in mp.get_all_start_methods()
+        or threading.active_count() > 1
+    ):
+        return [element_batch(elements)]
+
+    step = -(-len(elements) // (workers * TASKS_PER_WORKER))
+    bounds = [(i, min(i + step, len(elements))) for i in range(0, len(elements), step)]
+    with ProcessPoolExecutor(
+        workers,
+        mp_context=mp.get_context("fork"),
+        initializer=_set_elements,
+        initargs=(elements,),
+    ) as pool:
+        return list(pool.map(_element_slice, bounds))
+
+
+def normalize_elements(elements: list, workers: int = NORMALIZE_WORKERS) -> pd.DataFrame:
+    # Overpass elements -> one row per salon, indexed (see index_rows)
+    batches = element_batches(elements, workers)
+    return index_rows(pa.Table.from_batches(batches, ELEMENT_SCHEMA).to_pandas())
+
+
+def index_rows(df: pd.DataFrame) -> pd.DataFrame:
+    # Hierarchical grid cell per row; rows are kept sorted by cell so any
+    # bbox is a few contiguous slices (see grid_index.py)
+    if df.empty:
+        return df
+    df["cell_id"] = cell_ids(df["lat"], df["lon"])
+    df = df.sort_values("cell_id", kind="stable").reset_index(drop=True)
+    # One boolean column per category (cat_<id>), recomputed on every load
+    # so edits to categories.toml apply to data already on disk
+    for column, mask in classify(df).items():
+        df[column] = mask
+
+    # Dataset version: changes whenever the set of salons or their
+    # positions change. Used as the key for everything derived from df.
+    digest = hashlib.sha1(
+        pd.util.hash_pandas_object(
+            df[["osm_type", "osm_id", "lat", "lon"]], index=False
+        ).values.tobytes()
+    )
+    df.attrs["version"] = digest.hexdigest()[:12]
+    return df
+
+
+# -------------------------------------------------------------------
+# DERIVED INDEXES (BUILT ONCE PER DATASET VERSION, SHARED BY SESSIONS)
+# -------------------------------------------------------------------
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_grid_index(version: str, _df: pd.DataFrame) -> GridIndex:
+    return GridIndex(_df["lat"], _df["lon"], _df["cell_id"])
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_schedules(version: str, _df: pd.DataFrame):
+    # Packed weekly opening-hours bitmasks, one row per df row
+    return compile_schedules(_df["opening_hours"].tolist())
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_autocomplete(version: str, _df: pd.DataFrame) -> PrefixIndex:
+    columns = {"name": _df["name"], "city": _df["city"]}
+    if "street" in _df:
+        columns["street"] = _df["street"]
+    return PrefixIndex(columns)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_search_index(version: str, _df: pd.DataFrame) -> SearchIndex:
+    return SearchIndex(_df)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_sort_order(version: str, column: str, _df: pd.DataFrame):
+    # Row positions sorted by one column (text case-insensitively), and how
+    # many of them have a value; missing values come last
+    values = _df[column]
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.map(lambda v: v.lower() if isinstance(v, str) else None)
+    order = values.sort_values(kind="stable", na_position="last").index.to_numpy()
+    return order, int(values.notna().sum())
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_facets(version: str, _df: pd.DataFrame) -> FacetIndex:
+    return FacetIndex(
+        _df, niagara_mask(_df).to_numpy(), get_schedules(version, _df)
+    )
+
+
+# Heatmap points for the density view (used when zoomed out), per filter
+# key and zoom
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_density_points(key: tuple, zoom: int, _filtered: pd.DataFrame) -> list:
+    return heat_points(density_bins(_filtered["lat"], _filtered["lon"], zoom))
+
+
+# -------------------------------------------------------------------
+# FILTER LOGIC (SIMILAR TO YOUR NODE.JS MATCHING)
+# -------------------------------------------------------------------
+def _lower(value) -> str:
+    # Missing tags are None or NaN depending on the pandas string dtype
+    return value.lower() if isinstance(value, str) else ""
+
+
+def matches(row, q: str, type_choice: str) -> bool:
+    name = _lower(row.get("name"))
+    city = _lower(row.get("city"))
+    full_addr = _lower(row.get("address"))
+    hay = " ".join([name, city, full_addr])
+
+    # Type filter (the category's precomputed column, see index_rows)
+    column = CATEGORY_COLUMNS.get(type_choice)
+    if column is not None and not row.get(column):
+        return False
+
+    # Text search
+    if q:
+        t = q.strip().lower()
+        if t == "niagara":
+            if not (
+                any(c in hay for c in NIAGARA_CITIES) or "niagara" in full_addr
+            ):
+                return False
+        else:
+            terms = [term for term in t.split() if term]
+            for term in terms:
+                if term not in hay:
+                    return False
+
+    return True
+
+
+NIAGARA_PATTERN = "|".join(re.escape(c) for c in NIAGARA_CITIES + ["niagara"])
+
+
+def niagara_mask(df: pd.DataFrame) -> pd.Series:
+    city = df["city"].fillna("").astype(str).str.lower()
+    return city.str.contains(NIAGARA_PATTERN)
+
+
+# filter_key(...)[1:] when nothing is filtered
+NO_FILTERS = ("", "All", False, None, ())
+
+
+def filter_key(
+    df: pd.DataFrame,
+    search: str,
+    type_filter: str,
+    niagara_only: bool,
+    open_slot: int | tuple | None = None,
+    require: tuple = (),
+):
+    # Everything a filtered view depends on; used to key derived caches
+    q = " ".join(search.strip().lower().split())
+    return (
+        df.attrs.get("version"), q, type_filter, niagara_only, open_slot,
+        tuple(sorted(require)),
+    )
+
+
+def refines(q: str, previous_q: str) -> bool:
+    # True when every row matching q also matched previous_q (both already
+    # normalized by filter_key): each earlier term is part of some new term,
+    # e.g. "st ca" -> "st cat" or "st ca" -> "st ca 1". "niagara" on its own
+    # is a region search with its own rule, so it never takes part.
+    if not previous_q or "niagara" in (q, previous_q):
+        return False
+    terms = q.split()
+    return all(any(old in new for new in terms) for old in previous_q.split())
+
+
+def _match_search(df: pd.DataFrame, q: str, candidates=None) -> np.ndarray:
+    # matches() over all rows, or only over the given candidate positions
+    if candidates is None:
+        candidates = np.arange(len(df))
+    if len(candidates) == 0:
+        return candidates
+    keep = df.iloc[candidates].apply(lambda r: matches(r, q, "All"), axis=1)
+    return candidates[keep.to_numpy(dtype=bool)]
+
+
+def search_bitmap(df: pd.DataFrame, search: str, previous=None) -> FrozenBitMap:
+    # Rows matching the free-text search alone, cached like any other
+    # filter. previous is the same session's last (version, query, bitmap);
+    # when the new query only narrows it, just those rows are re-checked.
+    key = filter_key(df, search, *NO_FILTERS[1:])
+    bitmap = FILTER_CACHE.get(key)
+    if bitmap is None:
+        version, q = key[0], key[1]
+        candidates = None
+        if previous is not None and previous[0] == version and refines(q, previous[1]):
+            candidates = to_positions(previous[2])
+        bitmap = FILTER_CACHE.put(key, _match_search(df, q, candidates))
+    return bitmap
+
+
+def _evaluate_filters(
+    df: pd.DataFrame,
+    search: str,
+    type_filter: str,
+    niagara_only: bool,
+    open_slot: int | tuple | None,
+    require: tuple,
+) -> np.ndarray:
+    # Type, Niagara, opening hours and required flags come straight from
+    # the facet bitmaps; the free-text part is its own cached bitmap
+    facets = get_facets(df.attrs.get("version"), df)
+    bitmap = facets.combine(type_filter, niagara_only, open_slot, require)
+    if search.strip():
+        bitmap = bitmap & search_bitmap(df, search)
+    return to_positions(bitmap)
+
+
+def filter_bitmap(
+    df: pd.DataFrame,
+    search: str,
+    type_filter: str,
+    niagara_only: bool,
+    open_slot: int | tuple | None = None,
+    require: tuple = (),
+) -> FrozenBitMap:
+    # Row positions matching the filters as a Roaring bitmap, shared across
+    # sessions through the process-wide filter cache
+    key = filter_key(df, search, type_filter, niagara_only, open_slot, require)
+    if key[1] and key[2:] == NO_FILTERS[1:]:
+        return search_bitmap(df, search)
+    bitmap = FILTER_CACHE.get(key)
+    if bitmap is None:
+        positions = _evaluate_filters(
+            df, search, type_filter, niagara_only, open_slot, key[5]
+        )
+        bitmap = FILTER_CACHE.put(key, positions)
+    return bitmap
+
+
+def filter_positions(
+    df: pd.DataFrame,
+    search: str,
+    type_filter: str,
+    niagara_only: bool,
+    open_slot: int | tuple | None = None,
+    require: tuple = (),
+) -> np.ndarray:
+    # Sorted row positions matching the filters
+    return to_positions(
+        filter_bitmap(df, search, type_filter, niagara_only, open_slot, require)
+    )
+
+
+def facet_counts(
+    df: pd.DataFrame,
+    search: str,
+    type_filter: str,
+    niagara_only: bool,
+    open_slot: int | tuple | None = None,
+    require: tuple = (),
+) -> dict:
+    # How many rows each sidebar option would show, given the other active
+    # filters: bitmap ANDs plus one intersection count per option
+    facets = get_facets(df.attrs.get("version"), df)
+    base = filter_bitmap(df, search, "All", False, None)
+    if open_slot is not None:
+        base = base & facets.open_at(open_slot)
+
+    def without(option: str) -> FrozenBitMap:
+        # base narrowed by every active filter except option
+        result = base
+        if option != "type":
+            result = result & facets.types.get(type_filter, facets.all)
+        if niagara_only and option != "niagara":
+            result = result & facets.flags["niagara"]
+        for flag in require:
+            if flag != option:
+                result = result & facets.flags[flag]
+        return result
+
+    return {
+        "types": facets.counts(without("type"), facets.types),
+        "niagara": without("niagara").intersection_cardinality(facets.flags["niagara"]),
+        **{
+            flag: without(flag).intersection_cardinality(facets.flags[flag])
+            for flag in REQUIRE_FLAGS
+        },
+    }
+
+
+def filter_rows(
+    df: pd.DataFrame,
+    search: str,
+    type_filter: str,
+    niagara_only: bool,
+    open_slot: int | tuple | None = None,
+    require: tuple = (),
+) -> pd.DataFrame:
+    key = filter_key(df, search, type_filter, niagara_only, open_slot, require)
+    if key[1:] == NO_FILTERS:
+        return df
+    return df.iloc[
+        filter_positions(df, search, type_filter, niagara_only, open_slot, require)
+    ]
+
+
+def rank_rows(
+    df: pd.DataFrame, search: str, filtered: pd.DataFrame, k: int = TOP_K
+) -> pd.DataFrame:
+    # filtered with its k most relevant rows first and scored in a
+    # relevance column; the rest follow in their current order
+    index = get_search_index(df.attrs.get("version"), df)
+    positions = filtered.index.to_numpy()  # labels are row positions of df
+    best, scores = index.top_k(positions, search, k)
+    rest = positions[~np.isin(positions, best, assume_unique=True)]
+    ranked = df.iloc[np.concatenate([best, rest])]
+    return ranked.assign(
+        relevance=np.concatenate([scores.round(2), np.full(len(rest), np.nan)])
+    )
+
+
+def sorted_page(
+    df: pd.DataFrame,
+    positions: np.ndarray,
+    column: str,
+    descending: bool,
+    start: int,
+    stop: int,
+) -> np.ndarray:
+    # Positions[start:stop] after sorting by column. The precomputed order is
+    # filtered with a mask instead of sorting the selected rows each time.
+    order, valid = get_sort_order(df.attrs.get("version"), column, df)
+    selected = np.zeros(len(df), dtype=bool)
+    selected[positions] = True
+    if descending:
+        order = np.concatenate([order[:valid][::-1], order[valid:]])
+    return order[selected[order]][start:stop]
+
+
+def open_now(provinces: tuple = DEFAULT_PROVINCES) -> int | tuple:
+    # "Open now" as each province's local slot: one slot when they agree,
+    # else (province, slot) pairs (see FacetIndex.open_at)
+    slots = tuple((code, now_slot(ZoneInfo(PROVINCES[code][3]))) for code in provinces)
+    distinct = {slot for _, slot in slots}
+    if len(distinct) > 1:
+        return slots
+    return distinct.pop() if distinct else now_slot()
+
+
+def filter_query(
+    search: str,
+    type_filter: str,
+    niagara_only: bool,
+    open_slot: int | tuple | None = None,
+    require: tuple = (),
+    provinces: tuple = DEFAULT_PROVINCES,
+) -> str:
+    # Query string carrying the filters to the HTTP routes (tiles, exports)
+    params = {}
+    if provinces != DEFAULT_PROVINCES:
+        params["prov"] = ",".join(provinces)
+    if search.strip():
+        params["q"] = search
+    if type_filter != "All":
+        params["type"] = type_filter
+    if niagara_only:
+        params["niagara"] = "1"
+    if isinstance(open_slot, tuple):
+        params["open"] = ",".join(f"{code}:{slot}" for code, slot in open_slot)
+    elif open_slot is not None:
+        params["open"] = str(open_slot)
+    if require:
+        params["require"] = ",".join(sorted(require))
+    return urlencode(params)
+
+
+def _parse_slot(value: str):
+    return int(value) if value.isdigit() and int(value) < WEEK_SLOTS else None
+
+
+def parse_filter_query(params):
+    # Inverse of filter_query(); None if the parameters are invalid
+    open_slot = params.get("open")
+    if open_slot is not None:
+        if ":" in open_slot:
+            pairs = [p.partition(":") for p in open_slot.split(",")]
+            open_slot = tuple((code, _parse_slot(slot)) for code, _, slot in pairs)
+            if any(c not in PROVINCES or s is None for c, s in open_slot):
+                return None
+        else:
+            open_slot = _parse_slot(open_slot)
+            if open_slot is None:
+                return None
+    require = tuple(sorted(f for f in params.get("require", "").split(",") if f))
+    if any(f not in REQUIRE_FLAGS for f in require):
+        return None
+    return (
+        params.get("q", ""),
+        params.get("type", "All"),
+        params.get("niagara") == "1",
+        open_slot,
+        require,
+    )
+
+
+# -------------------------------------------------------------------
+# PARTITION BUILD (CLI)
+# -------------------------------------------------------------------
+# Fetches and normalizes provinces outside the server, where large inputs
+# can use worker processes, and writes them where PARTITIONS reads them.
+# Run it ahead of PARTITION_TTL (e.g. daily) and the server only reads
+# Parquet files.
+#
+#   python data.py                 (default provinces)
+#   python data.py CA-ON CA-QC --workers 8
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build province partitions")
+    parser.add_argument(
+        "provinces", nargs="*", choices=list(PROVINCES), default=list(DEFAULT_PROVINCES)
+    )
+    parser.add_argument("--workers", type=int, default=NORMALIZE_WORKERS)
+    args = parser.parse_args()
+    for code in args.provinces:
+        t0 = time.perf_counter()
+        df = fetch_province(code, args.workers)
+        PARTITIONS.save(code, df)
+        print(f"{code}: {len(df):,} rows in {time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,58 @@
+import numpy as np
+
+# -------------------------------------------------------------------
+# SERVER-SIDE DENSITY BINNING
+# -------------------------------------------------------------------
+# At low zoom a heatmap of pre-binned counts replaces the individual
+# markers. The number of bins depends only on the zoom level and the
+# extent of the data, never on how many salons fall inside them, so the
+# payload sent to the browser stays small at province scale.
+DENSITY_MAX_ZOOM = 9  # "Auto" view switches to markers above this zoom
+BIN_PIXELS = 16       # approximate bin size on screen
+MAX_BINS_PER_AXIS = 512
+
+
+def bin_size_deg(zoom: int) -> float:
+    # A 256px web-mercator tile spans 360 / 2**zoom degrees of longitude
+    return 360.0 / 2 ** zoom * BIN_PIXELS / 256
+
+
+def _edges(values: np.ndarray, size: float) -> np.ndarray:
+    # Snap edges to a global grid so bins line up across different filters.
+    # Past MAX_BINS_PER_AXIS the bins widen by a whole multiple of size
+    # (still on a global grid), so every point lands in a bin.
+    vmin, vmax = values.min(), values.max()
+    span = np.ceil(vmax / size) - np.floor(vmin / size)
+    size *= max(int(np.ceil(span / MAX_BINS_PER_AXIS)), 1)
+    lo = np.floor(vmin / size) * size
+    hi = np.ceil(vmax / size) * size
+    count = max(int(round((hi - lo) / size)), 1)
+    return np.linspace(lo, lo + count * size, count + 1)
+
+
+def density_bins(lat, lon, zoom: int) -> np.ndarray:
+    # (k, 3) array of [lat, lon, count] for every non-empty bin
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    ok = ~(np.isnan(lat) | np.isnan(lon))
+    lat, lon = lat[ok], lon[ok]
+    if len(lat) == 0:
+        return np.empty((0, 3))
+
+    size = bin_size_deg(zoom)
+    lat_edges = _edges(lat, size)
+    lon_edges = _edges(lon, size)
+    counts, _, _ = np.histogram2d(lat, lon, bins=[lat_edges, lon_edges])
+
+    iy, ix = np.nonzero(counts)
+    lat_c = (lat_edges[iy] + lat_edges[iy + 1]) / 2
+    lon_c = (lon_edges[ix] + lon_edges[ix + 1]) / 2
+    return np.column_stack([lat_c, lon_c, counts[iy, ix]])
+
+
+def heat_points(bins: np.ndarray) -> list:
+    # Leaflet.heat saturates at weight 1.0; sqrt keeps sparse areas visible
+    if len(bins) == 0:
+        return []
+    weights = np.sqrt(bins[:, 2] / bins[:, 2].max())
+    return np.column_stack([bins[:, :2].round(5), weights.round(3)]).tolist()
@@ -0,0 +1,277 @@
+import io
+import os
+import sqlite3
+import tempfile
+import zlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+
+from data import filter_rows, load_data, parse_filter_query
+from metrics import span
+from partitions import parse_provinces
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd CSV is only offered when installed
+    zstandard = None
+
+# -------------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------------
+EXPORT_ROUTE = "/exports/{file_name:str}"
+EXPORT_BASENAME = "ontario_salons_filtered"
+EXPORT_COLUMNS = [
+    "osm_type",
+    "osm_id",
+    "name",
+    "shop",
+    "phone",
+    "website",
+    "opening_hours",
+    "address",
+    "city",
+    "lat",
+    "lon",
+]
+PROPERTY_COLUMNS = [c for c in EXPORT_COLUMNS if c not in ("lat", "lon")]
+CHUNK_ROWS = 20_000
+
+
+# -------------------------------------------------------------------
+# CSV (PLAIN AND COMPRESSED, WRITTEN IN CHUNKS)
+# -------------------------------------------------------------------
+def iter_csv_chunks(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS):
+    # Header first, then CHUNK_ROWS rows at a time, so the whole file is
+    # never held as one string
+    cols = df[EXPORT_COLUMNS]
+    yield cols.head(0).to_csv(index=False).encode("utf-8")
+    for start in range(0, len(cols), chunk_rows):
+        chunk = cols.iloc[start : start + chunk_rows]
+        yield chunk.to_csv(index=False, header=False).encode("utf-8")
+
+
+def iter_csv_gzip(df: pd.DataFrame):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in iter_csv_chunks(df):
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def iter_csv_zstd(df: pd.DataFrame):
+    compressor = zstandard.ZstdCompressor(level=6).compressobj()
+    for chunk in iter_csv_chunks(df):
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+# -------------------------------------------------------------------
+# COLUMNAR / GEO FORMATS
+# -------------------------------------------------------------------
+def write_parquet(df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df[EXPORT_COLUMNS], preserve_index=False)
+    buf = io.BytesIO()
+    pq.write_table(table, buf, compression="zstd")
+    return buf.getvalue()
+
+
+def write_geojson(df: pd.DataFrame) -> bytes:
+    # Properties come from pandas' C JSON writer; the Feature wrappers are
+    # assembled with vectorized string concatenation.
+    if df.empty:
+        return b'{"type":"FeatureCollection","features":[]}'
+    props = pd.Series(
+        df[PROPERTY_COLUMNS]
+        .to_json(orient="records", lines=True, force_ascii=False)
+        .splitlines(),
+        index=df.index,
+    )
+    has_geom = df["lat"].notna() & df["lon"].notna()
+    coords = df["lon"].round(7).astype(str) + "," + df["lat"].round(7).astype(str)
+    geometry = ('{"type":"Point","coordinates":[' + coords + "]}").where(
+        has_geom, "null"
+    )
+    features = '{"type":"Feature","geometry":' + geometry + ',"properties":' + props + "}"
+    body = ",\n".join(features.tolist())
+    return ('{"type":"FeatureCollection","features":[\n' + body + "\n]}").encode("utf-8")
+
+
+GPKG_APPLICATION_ID = 0x47504B47  # "GPKG"
+GPKG_USER_VERSION = 10300
+GPKG_TABLE = "salons"
+# GeoPackage binary header (little-endian, no envelope) + WKB Point
+GPKG_POINT = np.dtype(
+    [
+        ("magic", "S2"),
+        ("version", "u1"),
+        ("flags", "u1"),
+        ("srs_id", "<i4"),
+        ("byte_order", "u1"),
+        ("wkb_type", "<u4"),
+        ("x", "<f8"),
+        ("y", "<f8"),
+    ]
+)
+
+GPKG_SCHEMA = """
+CREATE TABLE gpkg_spatial_ref_sys (
+    srs_name TEXT NOT NULL, srs_id INTEGER PRIMARY KEY,
+    organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL,
+    definition TEXT NOT NULL, description TEXT
+);
+CREATE TABLE gpkg_contents (
+    table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL,
+    identifier TEXT UNIQUE, description TEXT DEFAULT '',
+    last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE,
+    srs_id INTEGER REFERENCES gpkg_spatial_ref_sys(srs_id)
+);
+CREATE TABLE gpkg_geometry_columns (
+    table_name TEXT NOT NULL, column_name TEXT NOT NULL,
+    geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL,
+    z TINYINT NOT NULL, m TINYINT NOT NULL,
+    PRIMARY KEY (table_name, column_name)
+);
+INSERT INTO gpkg_spatial_ref_sys VALUES
+    ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined', NULL),
+    ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined', NULL),
+    ('WGS 84 geodetic', 4326, 'EPSG', 4326,
+     'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563]],' ||
+     'PRIMEM["Greenwich",0],UNIT["degree",0.0174532925199433]]', NULL);
+"""
+
+
+def write_geopackage(df: pd.DataFrame) -> bytes:
+    # Geometry blobs are built for all rows at once as one numpy record
+    # array; sqlite3 still inserts row by row, but from plain column lists.
+    n = len(df)
+    points = np.zeros(n, dtype=GPKG_POINT)
+    points["magic"] = b"GP"
+    points["flags"] = 0b00000001
+    points["srs_id"] = 4326
+    points["byte_order"] = 1
+    points["wkb_type"] = 1
+    points["x"] = df["lon"].to_numpy(dtype="float64")
+    points["y"] = df["lat"].to_numpy(dtype="float64")
+    raw = points.tobytes()
+    size = GPKG_POINT.itemsize
+    has_geom = (df["lat"].notna() & df["lon"].notna()).to_numpy()
+    geoms = [
+        raw[i * size : (i + 1) * size] if ok else None
+        for i, ok in enumerate(has_geom)
+    ]
+
+    columns = [
+        df[c].astype(object).where(df[c].notna(), None).tolist()
+        for c in PROPERTY_COLUMNS
+    ]
+    fd, path = tempfile.mkstemp(suffix=".gpkg")
+    os.close(fd)
+    try:
+        con = sqlite3.connect(path)
+        con.execute(f"PRAGMA application_id = {GPKG_APPLICATION_ID}")
+        con.execute(f"PRAGMA user_version = {GPKG_USER_VERSION}")
+        con.executescript(GPKG_SCHEMA)
+        col_defs = ", ".join(
+            f"{c} INTEGER" if c == "osm_id" else f"{c} TEXT" for c in PROPERTY_COLUMNS
+        )
+        con.execute(
+            f"CREATE TABLE {GPKG_TABLE} "
+            f"(fid INTEGER PRIMARY KEY AUTOINCREMENT, geom POINT, {col_defs})"
+        )
+        placeholders = ", ".join("?" * (len(PROPERTY_COLUMNS) + 1))
+        con.executemany(
+            f"INSERT INTO {GPKG_TABLE} (geom, {', '.join(PROPERTY_COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            zip(geoms, *columns),
+        )
+        lon = df["lon"][has_geom]
+        lat = df["lat"][has_geom]
+        con.execute(
+            "INSERT INTO gpkg_contents "
+            "(table_name, data_type, identifier, min_x, min_y, max_x, max_y, srs_id) "
+            "VALUES (?, 'features', ?, ?, ?, ?, ?, 4326)",
+            (
+                GPKG_TABLE,
+                GPKG_TABLE,
+                *(
+                    (float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max()))
+                    if len(lon)
+                    else (None, None, None, None)
+                ),
+            ),
+        )
+        con.execute(
+            "INSERT INTO gpkg_geometry_columns VALUES (?, 'geom', 'POINT', 4326, 0, 0)",
+            (GPKG_TABLE,),
+        )
+        con.commit()
+        con.close()
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+# -------------------------------------------------------------------
+# FORMAT REGISTRY
+# -------------------------------------------------------------------
+def _joined(chunks):
+    return lambda df: b"".join(chunks(df))
+
+
+# format -> (label, file extension, mime type, writer, chunk iterator)
+FORMATS = {
+    "csv": ("CSV", "csv", "text/csv", _joined(iter_csv_chunks), iter_csv_chunks),
+    "csv.gz": ("CSV (gzip)", "csv.gz", "application/gzip", _joined(iter_csv_gzip), iter_csv_gzip),
+    "parquet": ("Parquet", "parquet", "application/vnd.apache.parquet", write_parquet, None),
+    "geojson": ("GeoJSON", "geojson", "application/geo+json", write_geojson, None),
+    "gpkg": ("GeoPackage", "gpkg", "application/geopackage+sqlite3", write_geopackage, None),
+}
+if zstandard is not None:
+    FORMATS["csv.zst"] = ("CSV (zstd)", "csv.zst", "application/zstd", _joined(iter_csv_zstd), iter_csv_zstd)
+
+
+def export_file_name(fmt: str) -> str:
+    return f"{EXPORT_BASENAME}.{FORMATS[fmt][1]}"
+
+
+# Keyed by filter_key(), which already includes the dataset version, so a
+# repeated download of the same selection is served from memory. Only
+# called when the user actually clicks the download button.
+@st.cache_data(show_spinner=False, max_entries=8)
+def export(key: tuple, fmt: str, _filtered: pd.DataFrame) -> bytes:
+    with span(f"export_{fmt}"):
+        return FORMATS[fmt][3](_filtered)
+
+
+# -------------------------------------------------------------------
+# HTTP (STREAMED WHERE THE FORMAT ALLOWS IT)
+# -------------------------------------------------------------------
+async def export_endpoint(request):
+    file_name = request.path_params["file_name"]
+    fmt = next((f for f in FORMATS if export_file_name(f) == file_name), None)
+    filters = parse_filter_query(request.query_params)
+    provinces = parse_provinces(request.query_params.get("prov"))
+    if fmt is None:
+        return Response(status_code=404)
+    if filters is None or provinces is None:
+        return Response(status_code=400)
+
+    _, _, mime, writer, chunks = FORMATS[fmt]
+    headers = {"Content-Disposition": f'attachment; filename="{file_name}"'}
+    df = await run_in_threadpool(load_data, provinces)
+    filtered = await run_in_threadpool(filter_rows, df, *filters)
+    if chunks is not None:
+        return StreamingResponse(chunks(filtered), media_type=mime, headers=headers)
+    body = await run_in_threadpool(writer, filtered)
+    return Response(body, media_type=mime, headers=headers)
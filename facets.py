@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from pyroaring import BitMap, FrozenBitMap
+
+from categories import CATEGORIES, lower_text
+from opening_hours import open_mask
+
+# -------------------------------------------------------------------
+# FACET BITMAPS
+# -------------------------------------------------------------------
+# Every sidebar option that does not depend on the free-text search is
+# precomputed once per dataset as a Roaring bitmap of row positions, so
+# any combination is a few bitmap ANDs and a facet count is a single
+# intersection cardinality.
+TYPE_OPTIONS = ["All"] + [c.label for c in CATEGORIES]
+# Flags a filter can require (the "require" filter; Niagara has its own)
+REQUIRE_FLAGS = ("has_phone", "has_website", "has_hours")
+
+
+def _bitmap(mask) -> FrozenBitMap:
+    return FrozenBitMap(np.flatnonzero(np.asarray(mask)).astype(np.uint32))
+
+
+class FacetIndex:
+    def __init__(self, df: pd.DataFrame, niagara: np.ndarray, schedules):
+        tag = lower_text(df, "shop")
+
+        self.size = len(df)
+        self.all = FrozenBitMap(range(self.size))
+        self._packed, known = schedules
+        self._open: dict = {}
+
+        # One per categories.toml entry, from its cat_<id> column
+        self.types = {"All": self.all}
+        for c in CATEGORIES:
+            self.types[c.label] = _bitmap(df[c.column])
+        self.shops = {
+            value: _bitmap(tag == value) for value in tag[tag != ""].unique()
+        }
+        # Rows of each province, for slots that differ by time zone
+        province = df["province"] if "province" in df else pd.Series(dtype=object)
+        self.provinces = {
+            code: _bitmap(province == code) for code in province.dropna().unique()
+        }
+        self.flags = {
+            "niagara": _bitmap(niagara),
+            "has_phone": _bitmap(df["phone"].notna()),
+            "has_website": _bitmap(df["website"].notna()),
+            "has_hours": _bitmap(known),
+        }
+
+    def open_at(self, slot) -> FrozenBitMap:
+        # One bit test across all rows, memoized per 15-minute slot. A tuple
+        # of (province, slot) pairs checks each province at its own slot.
+        bitmap = self._open.get(slot)
+        if bitmap is None:
+            if isinstance(slot, tuple):
+                result = BitMap()
+                for code, local in slot:
+                    if code in self.provinces:
+                        result |= self.open_at(local) & self.provinces[code]
+                bitmap = FrozenBitMap(result)
+            else:
+                bitmap = _bitmap(open_mask(self._packed, slot))
+            self._open[slot] = bitmap
+        return bitmap
+
+    def combine(
+        self,
+        type_filter: str,
+        niagara_only: bool,
+        open_slot: int | tuple | None,
+        require: tuple = (),
+    ) -> FrozenBitMap:
+        result = self.types.get(type_filter, self.all)
+        if niagara_only:
+            result = result & self.flags["niagara"]
+        if open_slot is not None:
+            result = result & self.open_at(open_slot)
+        for flag in require:
+            result = result & self.flags[flag]
+        return result
+
+    def any_of(self, names) -> FrozenBitMap:
+        # OR over shop values, e.g. any_of(["hairdresser", "beauty"])
+        result = BitMap()
+        for name in names:
+            result |= self.shops.get(name, FrozenBitMap())
+        return FrozenBitMap(result)
+
+    def counts(self, base: FrozenBitMap, facets: dict) -> dict:
+        return {name: base.intersection_cardinality(bm) for name, bm in facets.items()}
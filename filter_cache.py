@@ -0,0 +1,79 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from pyroaring import FrozenBitMap
+
+# -------------------------------------------------------------------
+# PROCESS-WIDE FILTER RESULT CACHE
+# -------------------------------------------------------------------
+# Maps a normalized filter key (see data.filter_key) to the matching row
+# positions as a compressed Roaring bitmap. Shared by every session and
+# by the HTTP routes, bounded by the total serialized size of the
+# bitmaps rather than by entry count.
+MAX_BYTES = int(os.environ.get("SALONS_FILTER_CACHE_BYTES", 64 * 1024 * 1024))
+
+
+class FilterCache:
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, tuple[FrozenBitMap, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, positions: np.ndarray) -> FrozenBitMap:
+        bitmap = FrozenBitMap(np.asarray(positions, dtype=np.uint32))
+        size = len(bitmap.serialize())
+        if size > self.max_bytes:
+            return bitmap  # too large to keep; still usable by the caller
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (bitmap, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return bitmap
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+def to_positions(bitmap: FrozenBitMap) -> np.ndarray:
+    return np.frombuffer(bitmap.to_array(), dtype=np.uint32).astype(np.intp)
+
+
+FILTER_CACHE = FilterCache()
@@ -0,0 +1,164 @@
+import time
+
+import numpy as np
+
+# -------------------------------------------------------------------
+# HIERARCHICAL GRID (MORTON / QUADKEY CELL IDS)
+# -------------------------------------------------------------------
+# Every point gets a 2 * MAX_LEVEL bit cell id built by interleaving the
+# x (lon) and y (lat) cell coordinates at the finest level. Because the
+# bits are interleaved, every coarser quadtree cell is a contiguous range
+# of fine cell ids, so a bbox query becomes a handful of binary searches
+# over the sorted ids instead of a full scan.
+MAX_LEVEL = 16
+MAX_COVER_CELLS = 64
+NO_CELL = np.uint64(np.iinfo(np.uint64).max)  # rows without coordinates
+
+LAT_MIN, LAT_MAX = -90.0, 90.0
+LON_MIN, LON_MAX = -180.0, 180.0
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    # 0b1011 -> 0b01000101: put a zero bit between each bit of v
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+
+def cell_xy(lat, lon, level: int = MAX_LEVEL):
+    n = 1 << level
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    x = np.floor((lon - LON_MIN) / (LON_MAX - LON_MIN) * n)
+    y = np.floor((lat - LAT_MIN) / (LAT_MAX - LAT_MIN) * n)
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+
+def cell_ids(lat, lon, level: int = MAX_LEVEL) -> np.ndarray:
+    x, y = cell_xy(lat, lon, level)
+    valid = ~(np.isnan(x) | np.isnan(y))
+
+    ids = np.full(x.shape, NO_CELL, dtype=np.uint64)
+    ids[valid] = _spread_bits(x[valid]) | (_spread_bits(y[valid]) << np.uint64(1))
+    return ids
+
+
+def cell_bounds(level: int, x: int, y: int):
+    # (south, west, north, east) of cell (x, y) at the given level
+    n = 1 << level
+    lon_step = (LON_MAX - LON_MIN) / n
+    lat_step = (LAT_MAX - LAT_MIN) / n
+    west = LON_MIN + x * lon_step
+    south = LAT_MIN + y * lat_step
+    return south, west, south + lat_step, west + lon_step
+
+
+def cover_bbox(south, west, north, east, max_cells: int = MAX_COVER_CELLS):
+    # Quadtree covering of the bbox: a list of (lo, hi, inside) id ranges
+    # where "inside" means every point in the range is inside the bbox.
+    # Coarse cells are split until the cell budget would be exceeded.
+    def overlap(cell):
+        s, w, n, e = cell_bounds(*cell)
+        if s > north or n < south or w > east or e < west:
+            return None
+        return s >= south and n <= north and w >= west and e <= east
+
+    frontier = [(0, 0, 0)]
+    done = []
+    while frontier:
+        nxt = []
+        for level, x, y in frontier:
+            inside = overlap((level, x, y))
+            if inside is None:
+                continue
+            if inside or level == MAX_LEVEL:
+                done.append((level, x, y, inside))
+            else:
+                nxt.append((level, x, y))
+
+        children = [
+            (level + 1, 2 * x + dx, 2 * y + dy)
+            for level, x, y in nxt
+            for dy in (0, 1)
+            for dx in (0, 1)
+        ]
+        if len(done) + len(children) > max_cells:
+            done.extend((level, x, y, False) for level, x, y in nxt)
+            break
+        frontier = children
+
+    levels = np.array([c[0] for c in done], dtype=np.uint64)
+    xs = np.array([c[1] for c in done], dtype=np.uint64)
+    ys = np.array([c[2] for c in done], dtype=np.uint64)
+    shift = np.uint64(2) * (np.uint64(MAX_LEVEL) - levels)
+    los = (_spread_bits(xs) | (_spread_bits(ys) << np.uint64(1))) << shift
+    his = los + (np.uint64(1) << shift)
+
+    ranges = [(int(lo), int(hi), c[3]) for lo, hi, c in zip(los, his, done)]
+    ranges.sort()
+    return ranges
+
+
+# -------------------------------------------------------------------
+# INDEX
+# -------------------------------------------------------------------
+class GridIndex:
+    def __init__(self, lat, lon, ids=None):
+        lat = np.asarray(lat, dtype="float64")
+        lon = np.asarray(lon, dtype="float64")
+        if ids is None:
+            ids = cell_ids(lat, lon)
+        ids = np.asarray(ids, dtype=np.uint64)
+
+        # Rows normally arrive already sorted by cell id (load_data sorts
+        # them), in which case the stable argsort is a cheap identity pass.
+        self.order = np.argsort(ids, kind="stable")
+        self.ids = ids[self.order]
+        self.lat = lat[self.order]
+        self.lon = lon[self.order]
+
+        self.stats = {"queries": 0, "total_ms": 0.0, "last_ms": 0.0, "last_hits": 0}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def query(self, south, west, north, east) -> np.ndarray:
+        # Row positions (in the order the index was built from) inside the bbox
+        t0 = time.perf_counter()
+
+        ranges = cover_bbox(south, west, north, east)
+        los = np.array([r[0] for r in ranges], dtype=np.uint64)
+        his = np.array([r[1] for r in ranges], dtype=np.uint64)
+        starts = np.searchsorted(self.ids, los, side="left")
+        stops = np.searchsorted(self.ids, his, side="left")
+
+        parts = []
+        for (_, _, inside), a, b in zip(ranges, starts, stops):
+            if a == b:
+                continue
+            pos = np.arange(a, b)
+            if not inside:
+                lat = self.lat[a:b]
+                lon = self.lon[a:b]
+                keep = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+                pos = pos[keep]
+            parts.append(pos)
+
+        hits = np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+        hits = np.sort(self.order[hits])
+
+        elapsed = (time.perf_counter() - t0) * 1000
+        self.stats["queries"] += 1
+        self.stats["total_ms"] += elapsed
+        self.stats["last_ms"] = elapsed
+        self.stats["last_hits"] = len(hits)
+        return hits
+
+    def query_mask(self, south, west, north, east) -> np.ndarray:
+        mask = np.zeros(len(self.ids), dtype=bool)
+        mask[self.query(south, west, north, east)] = True
+        return mask
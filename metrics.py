@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+from starlette.responses import PlainTextResponse
+
+# -------------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------------
+METRICS_ROUTE = "/metrics"
+SAMPLES_PER_STAGE = 2048   # quantiles are over the most recent samples
+QUANTILES = (0.5, 0.95)
+# Optional copy of /metrics on disk, rewritten after every rerun, e.g. for
+# node_exporter's textfile collector
+METRICS_FILE = os.environ.get("SALONS_METRICS_FILE")
+
+# Allocation tracking has a real cost, so it is opt-in. The figure is the
+# net growth of traced memory during a span, process-wide, so concurrent
+# sessions show up in each other's numbers.
+if os.environ.get("SALONS_TRACE_MEMORY") == "1":
+    tracemalloc.start()
+
+
+# -------------------------------------------------------------------
+# SPANS
+# -------------------------------------------------------------------
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_STAGE))
+_totals = defaultdict(lambda: np.zeros(4))  # count, wall s, cpu s, bytes
+_local = threading.local()
+
+
+def start_run():
+    # Spans recorded on this thread from now on make up the current run
+    _local.spans = []
+
+
+def run_spans() -> list:
+    # (stage, wall ms, cpu ms, allocated bytes) for the current run
+    return list(getattr(_local, "spans", []))
+
+
+@contextmanager
+def span(stage: str):
+    tracing = tracemalloc.is_tracing()
+    mem0 = tracemalloc.get_traced_memory()[0] if tracing else 0
+    wall0, cpu0 = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall0
+        cpu = time.thread_time() - cpu0
+        allocated = tracemalloc.get_traced_memory()[0] - mem0 if tracing else 0
+        with _lock:
+            _samples[stage].append((wall, cpu, allocated))
+            _totals[stage] += (1, wall, cpu, allocated)
+        spans = getattr(_local, "spans", None)
+        if spans is not None:
+            spans.append((stage, wall * 1000, cpu * 1000, allocated))
+
+
+def summary() -> list:
+    # One row per stage: count and p50 / p95 wall and CPU ms
+    rows = []
+    with _lock:
+        for stage, samples in _samples.items():
+            values = np.array(samples)
+            wall = np.quantile(values[:, 0], QUANTILES) * 1000
+            cpu = np.quantile(values[:, 1], QUANTILES) * 1000
+            rows.append(
+                {
+                    "stage": stage,
+                    "count": int(_totals[stage][0]),
+                    "p50 ms": round(wall[0], 2),
+                    "p95 ms": round(wall[1], 2),
+                    "cpu p50 ms": round(cpu[0], 2),
+                    "cpu p95 ms": round(cpu[1], 2),
+                }
+            )
+    return rows
+
+
+# -------------------------------------------------------------------
+# PROMETHEUS TEXT FORMAT
+# -------------------------------------------------------------------
+_SERIES = [
+    # name, help, column in the samples, column in the totals
+    ("salons_stage_wall_seconds", "Wall time per rerun stage", 0, 1),
+    ("salons_stage_cpu_seconds", "CPU time per rerun stage", 1, 2),
+    ("salons_stage_allocated_bytes", "Net traced allocation per stage", 2, 3),
+]
+
+
+def prometheus_text() -> str:
+    lines = []
+    with _lock:
+        stages = {s: np.array(v) for s, v in _samples.items()}
+        totals = {s: t.copy() for s, t in _totals.items()}
+    for name, help_text, column, total in _SERIES:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} summary")
+        for stage, values in sorted(stages.items()):
+            label = f'stage="{stage}"'
+            for q, v in zip(QUANTILES, np.quantile(values[:, column], QUANTILES)):
+                lines.append(f'{name}{{{label},quantile="{q}"}} {v:.6g}')
+            lines.append(f"{name}_sum{{{label}}} {totals[stage][total]:.6g}")
+            lines.append(f"{name}_count{{{label}}} {int(totals[stage][0])}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile():
+    if not METRICS_FILE:
+        return
+    tmp = f"{METRICS_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, METRICS_FILE)
+
+
+async def metrics_endpoint(request):
+    return PlainTextResponse(
+        prometheus_text(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,153 @@
+import re
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# -------------------------------------------------------------------
+# WEEKLY SCHEDULE BITMASKS
+# -------------------------------------------------------------------
+# Each salon's OSM opening_hours string is compiled once into a week of
+# 15-minute slots (7 x 96 = 672 bits, packed into 84 bytes), so "open at
+# slot s" across every row is a single column lookup and bit test.
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+PACKED_BYTES = WEEK_SLOTS // 8
+
+TIMEZONE = ZoneInfo("America/Toronto")
+DAYS = ["mo", "tu", "we", "th", "fr", "sa", "su"]
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+_TIME_RANGE = re.compile(r"^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})(\+?)$")
+_OPEN_END = re.compile(r"^(\d{1,2}):(\d{2})\+$")
+_DAY_RANGE = re.compile(r"^([a-z]{2})(?:\s*-\s*([a-z]{2}))?$")
+_RULE_SPLIT = re.compile(r";|\|\||(?<=\d)\s*,\s*(?=[A-Za-z])")
+
+
+def _days(spec: str):
+    # "Mo-Fr,Su" -> [0, 1, 2, 3, 4, 6]; None for anything we don't handle
+    days = []
+    for part in spec.split(","):
+        m = _DAY_RANGE.match(part.strip())
+        if not m or m.group(1) not in DAYS:
+            return None
+        start = DAYS.index(m.group(1))
+        if m.group(2) is None:
+            days.append(start)
+            continue
+        if m.group(2) not in DAYS:
+            return None
+        end = DAYS.index(m.group(2))
+        days.extend((start + i) % 7 for i in range((end - start) % 7 + 1))
+    return days
+
+
+def _minutes(h: str, m: str) -> int:
+    return int(h) * 60 + int(m)
+
+
+def _times(spec: str):
+    # "09:00-12:00,13:00-17:30" -> [(540, 720), (780, 1050)]
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        m = _TIME_RANGE.match(part)
+        if m:
+            start, end = _minutes(m.group(1), m.group(2)), _minutes(m.group(3), m.group(4))
+        else:
+            m = _OPEN_END.match(part)
+            if not m:
+                return None
+            start, end = _minutes(m.group(1), m.group(2)), 24 * 60
+        if start > 24 * 60 or end > 48 * 60:
+            return None
+        if end <= start:
+            end += 24 * 60  # wraps past midnight into the next day
+        ranges.append((start, end))
+    return ranges
+
+
+def parse(spec: str):
+    # (7, 96) bool array of open slots, or None if the string is not in
+    # the subset of the opening_hours syntax we understand.
+    s = (spec or "").strip().lower()
+    if not s:
+        return None
+    week = np.zeros((7, SLOTS_PER_DAY), dtype=bool)
+    if s == "24/7":
+        week[:] = True
+        return week
+
+    for rule in _RULE_SPLIT.split(s):
+        rule = rule.strip()
+        if not rule:
+            continue
+        if rule in ("off", "closed"):
+            week[:] = False
+            continue
+        m = re.match(r"^([a-z][a-z,\s-]*?)?\s*([\d:+,\s-]+|off|closed|24/7)?$", rule)
+        if not m or not (m.group(1) or m.group(2)):
+            return None
+        day_spec, time_spec = (m.group(1) or "").strip(), m.group(2)
+
+        if day_spec in ("ph", "sh") or day_spec.startswith(("ph,", "sh,")):
+            continue  # public / school holidays are not modelled
+        days = _days(day_spec) if day_spec else list(range(7))
+        if days is None:
+            return None
+
+        # Later rules replace earlier ones for the days they mention
+        week[days] = False
+        if time_spec in ("off", "closed"):
+            continue
+        if time_spec is None or time_spec == "24/7":
+            week[days] = True
+            continue
+        ranges = _times(time_spec)
+        if ranges is None:
+            return None
+        flat = week.reshape(-1)
+        for day in days:
+            for start, end in ranges:
+                lo = day * SLOTS_PER_DAY + start // SLOT_MINUTES
+                hi = day * SLOTS_PER_DAY + -(-end // SLOT_MINUTES)
+                idx = np.arange(lo, hi) % WEEK_SLOTS
+                flat[idx] = True
+    return week
+
+
+def compile_schedules(values):
+    # (n, PACKED_BYTES) uint8 bitmasks plus a "known" flag per row.
+    # Most salons share a handful of strings, so each one is parsed once.
+    cache = {}
+    packed = np.zeros((len(values), PACKED_BYTES), dtype=np.uint8)
+    known = np.zeros(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        if not isinstance(v, str):
+            continue
+        if v not in cache:
+            week = parse(v)
+            cache[v] = None if week is None else np.packbits(week.reshape(-1))
+        bits = cache[v]
+        if bits is not None:
+            packed[i] = bits
+            known[i] = True
+    return packed, known
+
+
+# -------------------------------------------------------------------
+# QUERIES
+# -------------------------------------------------------------------
+def slot_of(day: int, hour: int, minute: int) -> int:
+    return day * SLOTS_PER_DAY + (hour * 60 + minute) // SLOT_MINUTES
+
+
+def now_slot(timezone: ZoneInfo = TIMEZONE) -> int:
+    now = datetime.now(timezone)
+    return slot_of(now.weekday(), now.hour, now.minute)
+
+
+def open_mask(packed: np.ndarray, slot: int) -> np.ndarray:
+    # np.packbits is big-endian within each byte
+    return ((packed[:, slot >> 3] >> (7 - (slot & 7))) & 1).astype(bool)
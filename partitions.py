@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# -------------------------------------------------------------------
+# PROVINCES AND TERRITORIES
+# -------------------------------------------------------------------
+# ISO 3166-2 code -> name, approximate centre (lat, lon) for the map, and
+# the time zone most of its population uses (for "Open now")
+PROVINCES = {
+    "CA-AB": ("Alberta", 53.9, -116.6, "America/Edmonton"),
+    "CA-BC": ("British Columbia", 53.7, -127.6, "America/Vancouver"),
+    "CA-MB": ("Manitoba", 53.8, -98.8, "America/Winnipeg"),
+    "CA-NB": ("New Brunswick", 46.5, -66.2, "America/Moncton"),
+    "CA-NL": ("Newfoundland and Labrador", 53.1, -57.7, "America/St_Johns"),
+    "CA-NS": ("Nova Scotia", 44.7, -63.7, "America/Halifax"),
+    "CA-NT": ("Northwest Territories", 64.8, -124.8, "America/Yellowknife"),
+    "CA-NU": ("Nunavut", 70.3, -83.1, "America/Iqaluit"),
+    "CA-ON": ("Ontario", 44.0, -79.5, "America/Toronto"),
+    "CA-PE": ("Prince Edward Island", 46.5, -63.4, "America/Halifax"),
+    "CA-QC": ("Quebec", 52.9, -73.5, "America/Toronto"),
+    "CA-SK": ("Saskatchewan", 52.9, -106.5, "America/Regina"),
+    "CA-YT": ("Yukon", 64.3, -135.0, "America/Whitehorse"),
+}
+DEFAULT_PROVINCES = ("CA-ON",)
+
+
+def parse_provinces(value: str | None):
+    # "CA-ON,CA-QC" -> sorted tuple of codes; None if any code is unknown
+    if not value:
+        return DEFAULT_PROVINCES
+    codes = tuple(sorted(set(value.upper().split(","))))
+    return codes if all(c in PROVINCES for c in codes) else None
+
+
+# -------------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------------
+PARTITION_DIR = os.environ.get("SALONS_PARTITION_DIR", ".partitions")
+PARTITION_TTL = 60 * 60 * 24   # seconds before a partition is fetched again
+# Budget for partitions held in memory (deep DataFrame size); the least
+# recently used are dropped beyond it and re-read from disk when needed
+MAX_BYTES = int(os.environ.get("SALONS_PARTITION_BYTES", 1024 * 1024 * 1024))
+FETCH_WORKERS = 4
+ROW_GROUP_ROWS = 16_384        # rows are cell-sorted, so a row group is a
+                               # contiguous range of grid cells
+
+
+# -------------------------------------------------------------------
+# PARTITION STORE
+# -------------------------------------------------------------------
+# One normalized, cell-sorted frame per province: in memory (LRU, bounded
+# by MAX_BYTES), then Parquet on disk, then fetch(code) from the source.
+# A stale file is still served if refreshing it fails.
+class PartitionStore:
+    def __init__(self, fetch, directory: str = PARTITION_DIR, max_bytes: int = MAX_BYTES):
+        self.fetch = fetch
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # code -> (frame, deep size, time its data was fetched)
+        self._frames: "OrderedDict[str, tuple[pd.DataFrame, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}  # code -> lock, so each partition loads once
+        self.bytes = 0
+        self.hits = 0
+        self.disk_reads = 0
+        self.fetches = 0
+        self.evictions = 0
+
+    def path(self, code: str) -> str:
+        return os.path.join(self.directory, f"{code}.parquet")
+
+    def _fresh(self, code: str):
+        # In-memory entry for code unless its data is older than PARTITION_TTL
+        entry = self._frames.get(code)
+        if entry is not None and time.time() - entry[2] < PARTITION_TTL:
+            return entry
+        return None
+
+    def get(self, code: str) -> pd.DataFrame:
+        with self._lock:
+            entry = self._fresh(code)
+            if entry is not None:
+                self._frames.move_to_end(code)
+                self.hits += 1
+                return entry[0]
+            loading = self._loading.setdefault(code, threading.Lock())
+        with loading:
+            with self._lock:
+                entry = self._fresh(code)
+            if entry is not None:  # loaded while we waited
+                return entry[0]
+            df, fetched = self._load(code)
+            self._put(code, df, fetched)
+            return df
+
+    def get_many(self, codes) -> list:
+        # Partitions in parallel: fetches and Parquet reads both release
+        # the GIL, so a cold multi-province load costs about one partition
+        if len(codes) == 1:
+            return [self.get(codes[0])]
+        with ThreadPoolExecutor(min(FETCH_WORKERS, len(codes))) as pool:
+            return list(pool.map(self.get, codes))
+
+    def _load(self, code: str) -> tuple:
+        # (frame, fetch time); a stale file served after a failed refresh
+        # counts as fetched now, so the refresh is retried after the TTL
+        path = self.path(code)
+        now = time.time()
+        fresh = os.path.exists(path) and now - os.path.getmtime(path) < PARTITION_TTL
+        fetched = os.path.getmtime(path) if fresh else now
+        if not fresh:
+            try:
+                df = self.fetch(code)
+            except Exception:
+                if not os.path.exists(path):
+                    raise
+            else:
+                self.fetches += 1
+                self._write(path, df)
+                return df, fetched
+        self.disk_reads += 1
+        return pd.read_parquet(path), fetched
+
+    def save(self, code: str, df: pd.DataFrame):
+        # Write a partition built elsewhere (python data.py); any copy in
+        # memory is dropped so the next get() reads the new file
+        self._write(self.path(code), df)
+        with self._lock:
+            old = self._frames.pop(code, None)
+            if old is not None:
+                self.bytes -= old[1]
+
+    def _write(self, path: str, df: pd.DataFrame):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp, index=False, row_group_size=ROW_GROUP_ROWS)
+        os.replace(tmp, path)
+
+    def _put(self, code: str, df: pd.DataFrame, fetched: float):
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            old = self._frames.pop(code, None)
+            if old is not None:  # expired entry being replaced
+                self.bytes -= old[1]
+            self._frames[code] = (df, size, fetched)
+            self.bytes += size
+            # Never evict the partition just loaded; the caller needs it
+            while self.bytes > self.max_bytes and len(self._frames) > 1:
+                _, (_, evicted, _) = self._frames.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": list(self._frames),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_reads": self.disk_reads,
+                "fetches": self.fetches,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,96 @@
+import json
+
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from data import load_data
+from partitions import DEFAULT_PROVINCES, parse_provinces
+
+# -------------------------------------------------------------------
+# POPUP RECORDS
+# -------------------------------------------------------------------
+# Markers and tile features carry only a row position; the popup is built
+# in the browser from a compact record when it is opened. Embedded
+# markers read records from one array in the page; vector tiles fetch
+# them from POPUP_ROUTE.
+POPUP_ROUTE = "/popups/{version:str}/{position:int}"
+POPUP_FIELDS = ["name", "address", "phone", "website", "osm"]
+
+
+def _text(values) -> list:
+    return [v if isinstance(v, str) and v else None for v in values]
+
+
+def popup_records(df: pd.DataFrame) -> list:
+    # One [name, address, phone, website, "type/id"] per row of df
+    osm = [
+        f"{t}/{i}" if isinstance(t, str) and t and i else None
+        for t, i in zip(df["osm_type"], df["osm_id"])
+    ]
+    return [
+        list(r)
+        for r in zip(
+            _text(df["name"]),
+            _text(df["address"]),
+            _text(df["phone"]),
+            _text(df["website"]),
+            osm,
+        )
+    ]
+
+
+def popup_url(version: str, provinces: tuple = DEFAULT_PROVINCES) -> str:
+    # URL template for the browser; "{id}" is replaced by the row position
+    url = POPUP_ROUTE.replace("{version:str}", version).replace("{position:int}", "{id}")
+    if provinces != DEFAULT_PROVINCES:
+        url += "?prov=" + ",".join(provinces)
+    return url
+
+
+# Popup HTML from a record, with every value escaped
+POPUP_HTML_JS = """
+function (r) {
+    var esc = function (s) {
+        return String(s).replace(/[&<>"]/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c];
+        });
+    };
+    var lines = ['<b>' + esc(r[0] || 'Unknown') + '</b>'];
+    if (r[1]) lines.push(esc(r[1]));
+    if (r[2]) lines.push('📞 ' + esc(r[2]));
+    var links = [];
+    // Only web links: escaping alone would still let javascript: URLs run
+    if (r[3] && /^https?:\/\//i.test(r[3])) {
+        links.push('<a href="' + esc(r[3]) +
+            '" target="_blank" rel="noopener">Website</a>');
+    }
+    if (r[4]) {
+        links.push('<a href="https://www.openstreetmap.org/' + esc(r[4]) +
+            '" target="_blank" rel="noopener">OSM</a>');
+    }
+    if (links.length) lines.push(links.join(' · '));
+    return lines.join('<br>');
+}"""
+
+
+# -------------------------------------------------------------------
+# HTTP
+# -------------------------------------------------------------------
+async def popup_endpoint(request):
+    provinces = parse_provinces(request.query_params.get("prov"))
+    if provinces is None:
+        return Response(status_code=400)
+    df = await run_in_threadpool(load_data, provinces)
+    position = request.path_params["position"]
+    # Positions are only meaningful within one dataset version
+    if request.path_params["version"] != df.attrs.get("version") or not (
+        0 <= position < len(df)
+    ):
+        return Response(status_code=404)
+    record = popup_records(df.iloc[position : position + 1])[0]
+    return Response(
+        json.dumps(record, ensure_ascii=False),
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=86400, immutable"},
+    )
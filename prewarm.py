@@ -0,0 +1,68 @@
+import logging
+import os
+
+from data import (
+    NO_FILTERS,
+    facet_counts,
+    filter_key,
+    filter_rows,
+    get_autocomplete,
+    get_density_points,
+    get_facets,
+    get_grid_index,
+    get_schedules,
+    get_search_index,
+    load_data,
+)
+from density import DENSITY_MAX_ZOOM
+from metrics import span
+from partitions import DEFAULT_PROVINCES
+
+# -------------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------------
+# On by default under server.py; SALONS_PREWARM=0 skips it (e.g. locally)
+PREWARM = os.environ.get("SALONS_PREWARM", "1") != "0"
+# Heatmaps built ahead for the unfiltered view: the opening zoom (6) and
+# the levels around it where "Auto" still shows density
+PREWARM_ZOOMS = range(4, DENSITY_MAX_ZOOM + 1)
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------
+# PREWARM
+# -------------------------------------------------------------------
+# Runs everything the first rerun of an unfiltered page would otherwise do
+# cold: the Overpass fetch, the shared indexes and the default heatmaps.
+# All of it lands in the same st.cache_data / st.cache_resource entries
+# the app reads, so this must run inside the Streamlit runtime (server.py
+# calls it from the st.App lifespan, after the runtime has started).
+def prewarm():
+    try:
+        with span("prewarm_load"):
+            # Passed explicitly: st.cache_data keys on the arguments given,
+            # so load_data() would be a separate entry from the app's call
+            df = load_data(DEFAULT_PROVINCES)
+        if df.empty:
+            return
+        version = df.attrs["version"]
+        with span("prewarm_indexes"):
+            for get in (
+                get_grid_index,
+                get_schedules,
+                get_facets,
+                get_search_index,
+                get_autocomplete,
+            ):
+                get(version, df)
+            facet_counts(df, *NO_FILTERS)
+        with span("prewarm_map"):
+            filtered = filter_rows(df, *NO_FILTERS)
+            key = filter_key(df, *NO_FILTERS)
+            for zoom in PREWARM_ZOOMS:
+                get_density_points(key, zoom, filtered)
+    except Exception:
+        # Serve anyway: the first visitor takes the cold path (and sees the
+        # load error, if any) exactly as without prewarming
+        logger.exception("Prewarm failed")
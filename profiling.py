@@ -0,0 +1,112 @@
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# -------------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------------
+# Profiling is off unless SALONS_PROFILE=1 (every rerun) or the page is
+# opened with ?profile=1 (that session's reruns only)
+PROFILE_ALL = os.environ.get("SALONS_PROFILE") == "1"
+PROFILE_DIR = os.environ.get("SALONS_PROFILE_DIR", ".profiles")
+MAX_PROFILES = 200          # oldest files are deleted beyond this
+SAMPLE_INTERVAL = 0.005     # seconds between stack samples
+PROFILE_SUFFIX = ".folded"
+
+
+# -------------------------------------------------------------------
+# SAMPLER
+# -------------------------------------------------------------------
+# A background thread snapshots the profiled thread's stack every few ms.
+# Unlike cProfile nothing is hooked into each call, so the overhead stays
+# small and the output has real stacks: one "outer;...;inner count" line
+# per distinct stack (the collapsed format flamegraph.pl, speedscope and
+# inferno read).
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Sampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="salons-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.path = None
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+# -------------------------------------------------------------------
+# STORAGE
+# -------------------------------------------------------------------
+def _safe(session: str) -> str:
+    return re.sub(r"[^A-Za-z0-9-]", "", session)[:36] or "anonymous"
+
+
+def _rotate():
+    files = sorted(f for f in os.listdir(PROFILE_DIR) if f.endswith(PROFILE_SUFFIX))
+    for name in files[:-MAX_PROFILES]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            pass  # another process rotated it first
+
+
+def save(folded: str, session: str) -> str:
+    # Timestamp first so that name order is age order for rotation
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%f")
+    path = os.path.join(PROFILE_DIR, f"{stamp}-{_safe(session)}{PROFILE_SUFFIX}")
+    with open(path, "w") as f:
+        f.write(folded)
+    _rotate()
+    return path
+
+
+def session_profiles(session: str) -> list:
+    # This session's profiles, newest first
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    tail = f"-{_safe(session)}{PROFILE_SUFFIX}"
+    return sorted(
+        (os.path.join(PROFILE_DIR, f) for f in os.listdir(PROFILE_DIR) if f.endswith(tail)),
+        reverse=True,
+    )
+
+
+@contextmanager
+def profiled(enabled: bool, session: str):
+    # Yields None when disabled; otherwise the Sampler, whose .path is set
+    # to the saved profile once the block exits
+    if not enabled:
+        yield None
+        return
+    sampler = Sampler(threading.get_ident())
+    sampler.start()
+    try:
+        yield sampler
+    finally:
+        sampler.stop()
+        sampler.path = save(sampler.folded(), session)
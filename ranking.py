@@ -0,0 +1,97 @@
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------------
+# RELEVANCE RANKING (BM25F OVER AN INVERTED INDEX)
+# -------------------------------------------------------------------
+# matches() decides which rows are shown; this decides their order. Each
+# field gets its own postings (token -> rows, term frequency), laid out
+# CSR-style over one sorted vocabulary, so every token starting with a
+# query term is a single contiguous slice per field. Field-weighted,
+# length-normalized term frequencies are summed per row and saturated
+# once per query term (BM25F), then the best k rows are selected without
+# sorting the rest.
+FIELD_WEIGHTS = {"name": 3.0, "city": 2.0, "address": 1.0}
+K1 = 1.2
+B = 0.75
+PREFIX_WEIGHT = 0.5      # "sal" -> "salon" counts half as much as "sal" itself
+TOP_K = 1000
+TOKEN = r"\w+"
+
+
+def _text(df: pd.DataFrame, col: str) -> pd.Series:
+    return df[col].fillna("").astype(str).str.lower()
+
+
+class _Postings:
+    def __init__(self, tokens: pd.Series, vocab_ids: dict, n_rows: int):
+        # tokens: one token per entry, indexed by row position
+        pairs = pd.DataFrame(
+            {"token": tokens.map(vocab_ids).to_numpy(), "row": tokens.index.to_numpy()}
+        )
+        tf = pairs.value_counts().sort_index()
+        token_ids = tf.index.get_level_values("token").to_numpy()
+
+        self.rows = tf.index.get_level_values("row").to_numpy(dtype=np.int32)
+        self.tf = tf.to_numpy(dtype=np.float32)
+        self.indptr = np.searchsorted(token_ids, np.arange(len(vocab_ids) + 1))
+        self.length = np.bincount(tokens.index.to_numpy(), minlength=n_rows)
+        self.avg_length = max(self.length.mean(), 1e-9)
+
+
+class SearchIndex:
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+        tokens = {
+            field: _text(df, field).str.findall(TOKEN).explode().dropna()
+            for field in FIELD_WEIGHTS
+        }
+        self.vocab = sorted(set().union(*(set(t) for t in tokens.values())))
+        vocab_ids = {token: i for i, token in enumerate(self.vocab)}
+        self.fields = {
+            field: _Postings(t, vocab_ids, self.size) for field, t in tokens.items()
+        }
+
+    def scores(self, query: str) -> np.ndarray:
+        # BM25F score of every row; a query term also matches the tokens it
+        # is a prefix of ("cath" -> "catharines"), at PREFIX_WEIGHT
+        total = np.zeros(self.size, dtype=np.float32)
+        for term in re.findall(TOKEN, query.lower()):
+            lo = bisect_left(self.vocab, term)
+            hi = bisect_left(self.vocab, term + "\uffff", lo)
+            if lo == hi:
+                continue
+            tf = np.zeros(self.size, dtype=np.float32)
+            for field, weight in FIELD_WEIGHTS.items():
+                p = self.fields[field]
+                part = slice(p.indptr[lo], p.indptr[hi])
+                rows = p.rows[part]
+                norm = 1 - B + B * p.length[rows] / p.avg_length
+                weights = weight * p.tf[part] / norm
+                # Postings of the exact token come first in the slice
+                exact = 0
+                if self.vocab[lo] == term:
+                    exact = p.indptr[lo + 1] - p.indptr[lo]
+                weights[exact:] *= PREFIX_WEIGHT
+                tf += np.bincount(rows, weights=weights, minlength=self.size).astype(
+                    np.float32
+                )
+            df_t = np.count_nonzero(tf)
+            idf = np.log(1 + (self.size - df_t + 0.5) / (df_t + 0.5))
+            total += idf * tf * (K1 + 1) / (tf + K1)
+        return total
+
+    def top_k(self, positions: np.ndarray, query: str, k: int = TOP_K):
+        # Best k of the given row positions, highest score first (ties keep
+        # position order), plus their scores
+        positions = np.asarray(positions)
+        scores = self.scores(query)[positions]
+        if len(positions) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(len(positions))
+        best = best[np.lexsort((positions[best], -scores[best]))]
+        return positions[best], scores[best]
@@ -0,0 +1,198 @@
+import json
+
+import streamlit as st
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from data import get_autocomplete, load_data
+from partitions import DEFAULT_PROVINCES, parse_provinces
+
+# -------------------------------------------------------------------
+# DEBOUNCED SEARCH INPUT WITH SUGGESTIONS
+# -------------------------------------------------------------------
+# st.text_input only reports on Enter / blur, and every report is a full
+# rerun. This box sends its value once typing pauses for DEBOUNCE_MS
+# (or right away on Enter, blur or picking a suggestion); each keystroke
+# cancels the pending send, so a burst of typing costs one rerun. A rerun
+# already in flight when a newer value arrives is stopped by Streamlit
+# (runner.fastReruns, on by default).
+#
+# Under server.py the box fetches suggestions for what is typed from
+# SUGGEST_ROUTE, without a rerun. Under plain `streamlit run app.py`
+# there is no route, and suggestions follow the last value sent.
+DEBOUNCE_MS = 300
+SUGGEST_DEBOUNCE_MS = 100
+SUGGEST_ROUTE = "/suggest/{version:str}"
+
+SEARCH_HTML = """
+<label class="search-label"></label>
+<input class="search-input" type="search" autocomplete="off" spellcheck="false">
+<datalist class="search-suggestions"></datalist>
+"""
+
+SEARCH_CSS = """
+.search-label {
+    display: block;
+    font-size: 0.875rem;
+    margin-bottom: 0.25rem;
+    color: var(--st-text-color);
+}
+.search-input {
+    box-sizing: border-box;
+    width: 100%;
+    padding: 0.5rem 0.75rem;
+    border: 1px solid var(--st-border-color);
+    border-radius: var(--st-base-radius);
+    background: var(--st-secondary-background-color);
+    color: var(--st-text-color);
+    font: inherit;
+}
+.search-input:focus {
+    outline: none;
+    border-color: var(--st-primary-color);
+}
+"""
+
+SEARCH_JS = """
+export default function (component) {
+    const { data, parentElement, setStateValue } = component;
+    const label = parentElement.querySelector(".search-label");
+    const input = parentElement.querySelector(".search-input");
+    const list = parentElement.querySelector(".search-suggestions");
+
+    label.textContent = data.label;
+    list.id = `${data.key}-suggestions`;
+    input.setAttribute("list", list.id);
+    const fill = (suggestions) => list.replaceChildren(
+        ...suggestions.map(([value, kind]) => {
+            const option = document.createElement("option");
+            option.value = value;
+            option.label = kind;
+            return option;
+        })
+    );
+    if (!data.suggest_url) {
+        fill(data.suggestions);
+    }
+    input.sendValue = setStateValue;
+    input.suggestUrl = data.suggest_url;
+
+    if (input.dataset.ready) {
+        return;
+    }
+    input.dataset.ready = "1";
+    input.value = data.value;
+
+    let timer = null;
+    let sent = data.value;
+    let suggestTimer = null;
+    let latest = 0;
+    const suggest = () => {
+        // Suggestions for what is typed now; stale responses are dropped
+        const id = ++latest;
+        const url = new URL(input.suggestUrl, window.location.href);
+        url.searchParams.set("q", input.value);
+        fetch(url)
+            .then((r) => (r.ok ? r.json() : []))
+            .then((suggestions) => {
+                if (id === latest) {
+                    fill(suggestions);
+                }
+            })
+            .catch(() => {});
+    };
+    const send = () => {
+        clearTimeout(timer);
+        timer = null;
+        if (input.value !== sent) {
+            sent = input.value;
+            input.sendValue("value", sent);
+        }
+    };
+
+    input.addEventListener("input", (e) => {
+        clearTimeout(timer);
+        if (input.suggestUrl) {
+            clearTimeout(suggestTimer);
+            suggestTimer = setTimeout(suggest, data.suggest_debounce_ms);
+        }
+        // Picking a datalist option is not typing; no need to wait
+        if (e.inputType === "insertReplacementText" || e.inputType === undefined) {
+            send();
+        } else {
+            timer = setTimeout(send, data.debounce_ms);
+        }
+    });
+    input.addEventListener("keydown", (e) => {
+        if (e.key === "Enter") {
+            send();
+        }
+    });
+    input.addEventListener("blur", send);
+}
+"""
+
+_search_box = st.components.v2.component(
+    "search_box", html=SEARCH_HTML, css=SEARCH_CSS, js=SEARCH_JS
+)
+
+
+def search_box(
+    label: str, suggest, key: str = "search", suggest_url: str | None = None
+) -> str:
+    # suggest(typed) -> [(completion, kind), ...] for the value typed so far;
+    # only called when there is no suggest_url (see suggest_url())
+    typed = (st.session_state.get(key) or {}).get("value", "")
+    result = _search_box(
+        key=key,
+        data={
+            "key": key,
+            "label": label,
+            "value": typed,
+            "suggestions": [] if suggest_url else suggest(typed),
+            "suggest_url": suggest_url,
+            "debounce_ms": DEBOUNCE_MS,
+            "suggest_debounce_ms": SUGGEST_DEBOUNCE_MS,
+        },
+        default={"value": ""},
+        on_value_change=lambda: None,
+    )
+    return result.value or ""
+
+
+# -------------------------------------------------------------------
+# HTTP (SUGGESTIONS)
+# -------------------------------------------------------------------
+def suggest_url(version: str, provinces: tuple = DEFAULT_PROVINCES) -> str:
+    # The box adds q= with what is typed
+    url = SUGGEST_ROUTE.replace("{version:str}", version)
+    if provinces != DEFAULT_PROVINCES:
+        url += "?prov=" + ",".join(provinces)
+    return url
+
+
+def _complete(provinces: tuple, version: str, typed: str):
+    df = load_data(provinces)
+    if df.attrs.get("version") != version:
+        return None
+    return get_autocomplete(version, df).complete(typed)
+
+
+async def suggest_endpoint(request):
+    provinces = parse_provinces(request.query_params.get("prov"))
+    if provinces is None:
+        return Response(status_code=400)
+    suggestions = await run_in_threadpool(
+        _complete,
+        provinces,
+        request.path_params["version"],
+        request.query_params.get("q", ""),
+    )
+    # Completions are only valid for the dataset version in the URL
+    if suggestions is None:
+        return Response(status_code=404)
+    return Response(
+        json.dumps(suggestions, ensure_ascii=False),
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
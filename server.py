@@ -0,0 +1,46 @@
+# ASGI entry point: the Streamlit app plus the routes it depends on.
+#
+#   streamlit run server.py          (or: uvicorn server:app --port 8501)
+#
+# Running `streamlit run app.py` directly still works; the map then falls
+# back to embedding markers in the page instead of loading vector tiles.
+#
+# The dataset, indexes and default heatmaps are built during startup (see
+# prewarm.py), and requests, including the health check, are only served
+# once that is done. SALONS_PREWARM=0 skips it.
+from contextlib import asynccontextmanager
+
+import streamlit as st
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Route
+
+import api
+import exports
+import metrics
+import popups
+import prewarm
+import search_box
+import tiles
+
+tiles.SERVING = True
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if prewarm.PREWARM:
+        await run_in_threadpool(prewarm.prewarm)
+    yield
+
+
+app = st.App(
+    "app.py",
+    lifespan=lifespan,
+    routes=[
+        Route(tiles.TILE_ROUTE, tiles.tile_endpoint),
+        Route(exports.EXPORT_ROUTE, exports.export_endpoint),
+        *api.routes,
+        Route(metrics.METRICS_ROUTE, metrics.metrics_endpoint),
+        Route(popups.POPUP_ROUTE, popups.popup_endpoint),
+        Route(search_box.SUGGEST_ROUTE, search_box.suggest_endpoint),
+    ],
+)
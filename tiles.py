@@ -0,0 +1,300 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from data import (
+    NO_FILTERS,
+    filter_key,
+    filter_positions,
+    filter_query,
+    get_grid_index,
+    load_data,
+    parse_filter_query,
+)
+from partitions import DEFAULT_PROVINCES, parse_provinces
+
+# -------------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------------
+# Feature ids are row positions, so the dataset version is part of the URL:
+# tiles cached by the browser never outlive the data their ids refer to
+TILE_ROUTE = "/tiles/{version:str}/{z:int}/{x:int}/{y:int}.pbf"
+LAYER_NAME = "salons"
+EXTENT = 4096
+BUFFER = EXTENT // 16      # points this close to the edge go in both tiles
+MAX_ZOOM = 20
+CLUSTER_MAX_ZOOM = 12      # at or below this zoom, points are clustered
+CLUSTER_CELL = 128         # cluster grid size in tile units (32 x 32 per tile)
+
+TILE_CACHE_DIR = os.environ.get("SALONS_TILE_CACHE", ".tile_cache")
+LRU_TILES = 4096
+TILE_FORMAT = 2            # bump when feature properties change; keys the disk cache
+
+# Set by server.py when TILE_ROUTE is mounted next to the Streamlit app.
+# When the app runs under plain `streamlit run app.py` there is no tile
+# route and the map falls back to embedded markers.
+SERVING = False
+
+
+# -------------------------------------------------------------------
+# MAPBOX VECTOR TILE ENCODING (POINTS ONLY)
+# -------------------------------------------------------------------
+# Minimal protobuf writer for the MVT 2.1 spec: one layer of POINT
+# features with string / integer properties.
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _field(num: int, payload: bytes) -> bytes:
+    # length-delimited field (wire type 2)
+    return _varint(num << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _uint_field(num: int, value: int) -> bytes:
+    return _varint(num << 3) + _varint(value)
+
+
+def _zigzag(n: int) -> int:
+    return (n << 1) ^ (n >> 63)
+
+
+def _value(v) -> bytes:
+    if isinstance(v, str):
+        return _field(1, v.encode("utf-8"))
+    if v >= 0:
+        return _uint_field(5, int(v))
+    return _varint(6 << 3) + _varint(_zigzag(int(v)))
+
+
+def encode_layer(name: str, xs, ys, ids, props) -> bytes:
+    keys, values = {}, {}
+    features = []
+    for x, y, fid, p in zip(xs, ys, ids, props):
+        tags = []
+        for k, v in p.items():
+            if v is None:
+                continue
+            tags.append(keys.setdefault(k, len(keys)))
+            tags.append(values.setdefault((type(v), v), len(values)))
+        # MoveTo(1) with one coordinate pair
+        geometry = _varint(9) + _varint(_zigzag(int(x))) + _varint(_zigzag(int(y)))
+        features.append(
+            _field(
+                2,
+                _uint_field(1, int(fid))
+                + _field(2, b"".join(_varint(t) for t in tags))
+                + _uint_field(3, 1)
+                + _field(4, geometry),
+            )
+        )
+
+    return _field(
+        3,
+        _uint_field(15, 2)
+        + _field(1, name.encode("utf-8"))
+        + b"".join(features)
+        + b"".join(_field(3, k.encode("utf-8")) for k in keys)
+        + b"".join(_field(4, _value(v)) for _, v in values)
+        + _uint_field(5, EXTENT),
+    )
+
+
+# -------------------------------------------------------------------
+# TILE GEOMETRY (WEB MERCATOR)
+# -------------------------------------------------------------------
+def tile_bounds(z: int, x: int, y: int):
+    # (south, west, north, east) in degrees
+    n = 2 ** z
+
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lat(y + 1), x / n * 360 - 180, lat(y), (x + 1) / n * 360 - 180
+
+
+def tile_coords(lat, lon, z: int, x: int, y: int):
+    # Positions in tile units (0..EXTENT inside the tile, y pointing down)
+    n = 2 ** z
+    lat_r = np.radians(np.asarray(lat, dtype="float64"))
+    fx = (np.asarray(lon, dtype="float64") + 180) / 360 * n
+    fy = (1 - np.log(np.tan(lat_r) + 1 / np.cos(lat_r)) / math.pi) / 2 * n
+    return (fx - x) * EXTENT, (fy - y) * EXTENT
+
+
+# -------------------------------------------------------------------
+# TILE BUILD
+# -------------------------------------------------------------------
+def _properties(position: int, shop) -> dict:
+    # The row position and the shop tag (for the colour); the popup itself
+    # is fetched from popups.POPUP_ROUTE on click
+    return {"id": int(position), "shop": shop if isinstance(shop, str) else None}
+
+
+def build_tile(df: pd.DataFrame, positions: np.ndarray, z: int, x: int, y: int) -> bytes:
+    # positions: row positions of df that fall in (or near) this tile
+    if len(positions) == 0:
+        return b""
+
+    sub = df.iloc[positions]
+    px, py = tile_coords(sub["lat"], sub["lon"], z, x, y)
+
+    if z > CLUSTER_MAX_ZOOM:
+        props = [_properties(p, s) for p, s in zip(positions, sub["shop"])]
+        return encode_layer(LAYER_NAME, px.round(), py.round(), positions, props)
+
+    # Grid clustering: one point per occupied cell at the cell's centroid.
+    # Buffer points are left to the neighbouring tile so nothing is counted twice.
+    inside = (px >= 0) & (px < EXTENT) & (py >= 0) & (py < EXTENT)
+    px, py = px[inside], py[inside]
+    if len(px) == 0:
+        return b""
+    cells = (py // CLUSTER_CELL).astype(np.int64) * (EXTENT // CLUSTER_CELL) + (
+        px // CLUSTER_CELL
+    ).astype(np.int64)
+    uniq, inverse, counts = np.unique(cells, return_inverse=True, return_counts=True)
+    cx = np.bincount(inverse, weights=px) / counts
+    cy = np.bincount(inverse, weights=py) / counts
+    props = [{"count": int(c)} for c in counts]
+    return encode_layer(LAYER_NAME, cx.round(), cy.round(), uniq, props)
+
+
+# -------------------------------------------------------------------
+# CACHES (LRU IN MEMORY, DEFAULT VIEW ON DISK)
+# -------------------------------------------------------------------
+_lock = threading.Lock()
+_tiles: "OrderedDict[tuple, bytes]" = OrderedDict()
+stats = {"requests": 0, "lru_hits": 0, "disk_hits": 0, "generated": 0, "gen_ms": 0.0}
+
+
+def _lru_get(cache: OrderedDict, key):
+    with _lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def _lru_put(cache: OrderedDict, key, value, limit: int):
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+
+def _disk_path(version: str, z: int, x: int, y: int) -> str:
+    return os.path.join(
+        TILE_CACHE_DIR, f"{version}-v{TILE_FORMAT}", str(z), str(x), f"{y}.pbf"
+    )
+
+
+def get_tile(
+    z: int,
+    x: int,
+    y: int,
+    search: str = "",
+    type_filter: str = "All",
+    niagara_only: bool = False,
+    open_slot: int | tuple | None = None,
+    require: tuple = (),
+    provinces: tuple = DEFAULT_PROVINCES,
+) -> bytes:
+    df = load_data(provinces)
+    key = filter_key(df, search, type_filter, niagara_only, open_slot, require)
+    stats["requests"] += 1
+
+    tile = _lru_get(_tiles, (key, z, x, y))
+    if tile is not None:
+        stats["lru_hits"] += 1
+        return tile
+
+    # Only the unfiltered base layer goes to disk: it is what every first
+    # page load requests, while filtered variants are per-user and short-lived.
+    unfiltered = key[1:] == NO_FILTERS
+    path = _disk_path(key[0], z, x, y) if unfiltered else None
+    if path and os.path.exists(path):
+        with open(path, "rb") as f:
+            tile = f.read()
+        stats["disk_hits"] += 1
+    else:
+        t0 = time.perf_counter()
+        index = get_grid_index(key[0], df)
+        s, w, n, e = tile_bounds(z, x, y)
+        pad_lat = (n - s) * BUFFER / EXTENT
+        pad_lon = (e - w) * BUFFER / EXTENT
+        positions = index.query(s - pad_lat, w - pad_lon, n + pad_lat, e + pad_lon)
+        if not unfiltered:
+            matching = filter_positions(
+                df, search, type_filter, niagara_only, open_slot, require
+            )
+            positions = np.intersect1d(positions, matching, assume_unique=True)
+        tile = build_tile(df, positions, z, x, y)
+        stats["generated"] += 1
+        stats["gen_ms"] += (time.perf_counter() - t0) * 1000
+
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(tile)
+            os.replace(tmp, path)
+
+    _lru_put(_tiles, (key, z, x, y), tile, LRU_TILES)
+    return tile
+
+
+# -------------------------------------------------------------------
+# HTTP
+# -------------------------------------------------------------------
+def tile_url(
+    version: str,
+    search: str,
+    type_filter: str,
+    niagara_only: bool,
+    open_slot: int | tuple | None = None,
+    require: tuple = (),
+    provinces: tuple = DEFAULT_PROVINCES,
+) -> str:
+    # Leaflet URL template for the current filters
+    url = TILE_ROUTE.replace("{version:str}", version).replace(":int", "")
+    query = filter_query(
+        search, type_filter, niagara_only, open_slot, require, provinces
+    )
+    return f"{url}?{query}" if query else url
+
+
+async def tile_endpoint(request):
+    z = request.path_params["z"]
+    x = request.path_params["x"]
+    y = request.path_params["y"]
+    if z > MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return Response(status_code=404)
+
+    filters = parse_filter_query(request.query_params)
+    provinces = parse_provinces(request.query_params.get("prov"))
+    if filters is None or provinces is None:
+        return Response(status_code=400)
+    df = await run_in_threadpool(load_data, provinces)
+    if request.path_params["version"] != df.attrs.get("version"):
+        return Response(status_code=404)
+    tile = await run_in_threadpool(get_tile, z, x, y, *filters, provinces)
+    return Response(
+        tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"Cache-Control": "public, max-age=3600"},
+    )